@@ -3,30 +3,33 @@ from ...domain_layer.entities.participant import Participant, PositionType
 from ...domain_layer.value_objects.participant_name import ParticipantName
 from ...domain_layer.value_objects.laboratory_name import LaboratoryName
 
+# 参加者に必須の属性
+_REQUIRED_PARTICIPANT_KEYS = ("name", "position", "lab")
+
 class ParticipantFactory:
     @staticmethod
-    def create_participant(dict) -> Participant:
+    def create_participant(data) -> Participant:
         """
         Create a Participant object from a dictionary.
         """
         try:
-            if "name" not in dict or dict["name"] is None:
-                raise ValueError("Missing parameter: name")
-            if "position" not in dict or dict["position"] is None:
-                raise ValueError("Missing parameter: position")
-            if "lab" not in dict or dict["lab"] is None:
-                raise ValueError("Missing parameter: lab")
+            if not isinstance(data, dict):
+                raise ValueError("Each participant must be an object")
+            name, position, lab = (data.get(key) for key in _REQUIRED_PARTICIPANT_KEYS)
+            for key, value in zip(_REQUIRED_PARTICIPANT_KEYS, (name, position, lab)):
+                if value is None:
+                    raise ValueError(f"Missing parameter: {key}")
             
-            if not isinstance(dict["name"], str):
+            if not isinstance(name, str):
                 raise ValueError("Attribute name must be a string")
-            if not isinstance(dict["position"], str):
+            if not isinstance(position, str):
                 raise ValueError("Attribute position must be a string")
-            if not isinstance(dict["lab"], list):
+            if not isinstance(lab, list):
                 raise ValueError("Attribute lab must be a list of strings")
             return Participant.create(
-                ParticipantName.of(dict["name"]),
-                PositionType.value_of(dict["position"]),
-                LaboratoryName.of(dict["lab"]),
+                ParticipantName.of(name),
+                PositionType.value_of(position),
+                LaboratoryName.of(lab),
             )
         except ValueError as e:
             raise ValueError(f"Error creating participant: {e}")
\ No newline at end of file
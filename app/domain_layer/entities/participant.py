@@ -1,3 +1,4 @@
+from functools import cached_property
 from pydantic import BaseModel
 from enum import Enum
 
@@ -61,6 +62,11 @@ class Participant(BaseModel):
     def get_lab(self) -> LaboratoryName:
         return self.lab
 
+    @cached_property
+    def display_label(self) -> str:
+        """結果出力用の表示名 "名前(ポジション)"。初回アクセス時に一度だけ組み立てる"""
+        return f"{self.name.as_str()}({self.position.as_str()})"
+
     def as_str(self) -> str:
         return f"Participant {self.id}: {self.name}"
     
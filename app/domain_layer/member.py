@@ -31,7 +31,7 @@ class Attributes:
     attributes: dict[str, Attribute]
 
     @staticmethod
-    def of(attributes: dict[str, str]) -> 'Attributes':
+    def of(attributes: dict[str, Attribute]) -> 'Attributes':
         return Attributes(attributes)
 
     @staticmethod
@@ -16,9 +16,11 @@ class GroupAssignerHeuristic(GroupAssigner):
     ヒューリスティックアルゴリズムに基づくグループ割り当てクラス
     """
     
-    def __init__(self, max_iterations: int = 1000, max_attempts: int = 100):
+    def __init__(self, max_iterations: int = 1000, max_attempts: int = 100, rng: Optional[random.Random] = None):
         self.max_iterations = max_iterations
         self.max_attempts = max_attempts
+        # 乱数生成器（未指定時はモジュールの random をそのまま使う）
+        self.rng = rng if rng is not None else random
     
     def assign_groups(self, program: Program) -> Dict[int, Groups]:
         """
@@ -187,7 +189,7 @@ class GroupAssignerHeuristic(GroupAssigner):
         """
         # 各職位の候補をシャッフル
         for pos in PositionType:
-            random.shuffle(position_groups[pos])
+            self.rng.shuffle(position_groups[pos])
 
         # ターゲット総数のチェック
         for gi in range(len(groups)):
@@ -436,7 +438,7 @@ class GroupAssignerHeuristic(GroupAssigner):
         """
         # 各職位の参加者をシャッフル
         for position_group in position_groups:
-            random.shuffle(position_group)
+            self.rng.shuffle(position_group)
         
         # ラウンドロビン方式で割り当て
         group_idx = 0
@@ -603,7 +605,7 @@ class GroupAssignerHeuristic(GroupAssigner):
             avoid_lab_conflicts: ラボ重複を避けるかどうか
             avoid_used_pairs: 既出ペアを避けるかどうか
         """
-        random.shuffle(participants)  # ランダムにシャッフル
+        self.rng.shuffle(participants)  # ランダムにシャッフル
         
         for participant in participants:
             best_group_idx = self._find_best_group_for_participant(
@@ -1,6 +1,15 @@
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import chain
+import heapq
+import os
 import random
 import time
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from numba import njit
 
 from ...domain_layer.services.group_assigner import GroupAssigner
 from ...domain_layer.entities.program import Program
@@ -10,6 +19,104 @@ from ...domain_layer.entities.group import Group
 from ...domain_layer.entities.participant import PositionType
 
 from .group_assigner_heuristic import GroupAssignerHeuristic
+from .island_model import receive_immigrants, run_islands
+
+
+@njit(cache=True)
+def _fitness_core(members, group_off, group_session, slot_pid, lab_indptr, lab_values, mins, maxs, num_pids, num_labs):
+    """適応度の罰則項を整数配列だけで計算する JIT カーネル。
+    members はセッション横断のスロット番号（slot_off[s] + 参加者index）を全グループ分連結したもの、
+    group_off はグループ境界、group_session は各グループのセッション番号。
+    戻り値: (size_pen, pair_pen, spread_pen, range_pen, lab_pen)"""
+    n_groups = group_off.shape[0] - 1
+
+    # サイズ違反は W_SIZE が他の罰則を圧倒するため、違反があればペア等の集計をせずに返す
+    size_pen = 0
+    for g in range(n_groups):
+        size = group_off[g + 1] - group_off[g]
+        s = group_session[g]
+        if size < mins[s] or size > maxs[s]:
+            size_pen += 1
+    if size_pen > 0:
+        return size_pen, 0, 0.0, 0, 0
+
+    together = np.zeros(max(1, num_pids * (num_pids - 1) // 2), dtype=np.int32)
+    distinct = np.zeros(num_pids, dtype=np.int64)
+    present = np.zeros(num_pids, dtype=np.bool_)
+    lab_count = np.zeros(max(1, num_labs), dtype=np.int32)
+
+    pair_pen = 0
+    lab_pen = 0
+    for g in range(n_groups):
+        start = group_off[g]
+        end = group_off[g + 1]
+
+        for i in range(start, end):
+            slot = members[i]
+            a = slot_pid[slot]
+            present[a] = True
+            # ペア回数: 三角配列 together[a,b] (a<b)。c回目の再会で c-1 を加算 → Σ c(c-1)/2
+            for j in range(i + 1, end):
+                b = slot_pid[members[j]]
+                if a == b:
+                    continue
+                lo = min(a, b)
+                hi = max(a, b)
+                k = lo * num_pids - lo * (lo + 1) // 2 + (hi - lo - 1)
+                c = together[k]
+                if c == 0:
+                    distinct[lo] += 1
+                    distinct[hi] += 1
+                pair_pen += c
+                together[k] = c + 1
+            # ラボ重複も同様に累積
+            for l in range(lab_indptr[slot], lab_indptr[slot + 1]):
+                lab = lab_values[l]
+                lab_pen += lab_count[lab]
+                lab_count[lab] += 1
+        for i in range(start, end):
+            slot = members[i]
+            for l in range(lab_indptr[slot], lab_indptr[slot + 1]):
+                lab_count[lab_values[l]] = 0
+
+    # 異なる同席人数の分散とレンジ
+    n_present = 0
+    total = 0.0
+    lo_cnt = 0
+    hi_cnt = 0
+    for p in range(num_pids):
+        if present[p]:
+            if n_present == 0 or distinct[p] < lo_cnt:
+                lo_cnt = distinct[p]
+            if n_present == 0 or distinct[p] > hi_cnt:
+                hi_cnt = distinct[p]
+            n_present += 1
+            total += distinct[p]
+    spread_pen = 0.0
+    if n_present > 0:
+        avg = total / n_present
+        for p in range(num_pids):
+            if present[p]:
+                spread_pen += (distinct[p] - avg) ** 2
+        spread_pen /= n_present
+    return size_pen, pair_pen, spread_pen, hi_cnt - lo_cnt, lab_pen
+
+
+# 職位 -> 整数コード（配列上で職位を比較するため）
+_POSITION_CODE: Dict[PositionType, int] = {pos: code for code, pos in enumerate(PositionType)}
+
+
+# プロセスプール上のワーカーが参照する読み取り専用の配列（initializer で一度だけ配布）
+_WORKER_FITNESS_ARRAYS: Optional[Dict[str, Any]] = None
+
+
+def _init_fitness_worker(fitness_arrays: Dict[str, Any]) -> None:
+    global _WORKER_FITNESS_ARRAYS
+    _WORKER_FITNESS_ARRAYS = fitness_arrays
+
+
+def _fitness_worker(individual: List[List[List[int]]]) -> float:
+    return GroupAssignerHybridGA._fitness(individual, _WORKER_FITNESS_ARRAYS)
 
 
 class GroupAssignerHybridGA(GroupAssigner):
@@ -26,6 +133,11 @@ class GroupAssignerHybridGA(GroupAssigner):
         mutation_rate: float = 0.08,
         time_budget_seconds: float = 3.0,
         heuristic_iterations: int = 200,
+        num_workers: Optional[int] = 1,
+        num_islands: int = 1,
+        migration_interval: int = 25,
+        migration_size: int = 2,
+        rng: Optional[random.Random] = None,
     ) -> None:
         self.num_heuristic_seeds = num_heuristic_seeds
         self.generations = generations
@@ -33,11 +145,24 @@ class GroupAssignerHybridGA(GroupAssigner):
         self.mutation_rate = mutation_rate
         self.time_budget_seconds = time_budget_seconds
         self.heuristic_iterations = heuristic_iterations
+        # 適応度評価の並列プロセス数（1 なら逐次、None なら CPU コア数）
+        self.num_workers = num_workers if num_workers is not None else (os.cpu_count() or 1)
+        # 島モデル: num_islands > 1 なら各島を別プロセスで進化させ、リング状に精鋭を移住させる
+        self.num_islands = num_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        # GA 演算子が使う乱数生成器（島モデルでは島ごとに差し替える）
+        self.rng = rng if rng is not None else random.Random()
+        # 正規化した個体 -> 適応度 の LRU キャッシュ（assign_groups ごとにリセット）
+        self._fitness_cache: "OrderedDict[Tuple, float]" = OrderedDict()
 
     # ========= public =========
     def assign_groups(self, program: Program) -> Dict[int, Groups]:
         sessions = program.get_sessions()
         sessions_list = [s for s in sessions]
+        session_cache = self._build_session_cache(sessions_list)
+        fitness_arrays = self._build_fitness_arrays(session_cache)
+        self._fitness_cache = OrderedDict()
 
         # 1) ヒューリスティックで初期解を複数作成
         seeds = self._make_heuristic_seeds(program, self.num_heuristic_seeds)
@@ -45,15 +170,12 @@ class GroupAssignerHybridGA(GroupAssigner):
         # 2) GAの設定／補助
         def to_index_solution(groups_dict: Dict[int, Groups]) -> List[List[List[int]]]:
             sols: List[List[List[int]]] = []
-            for session_index, session in enumerate(sessions_list):
+            for session_index in range(len(sessions_list)):
+                # 参加者ID -> セッション内インデックス（該当なしは0にフォールバック）
+                id_to_idx = session_cache[session_index]["id_to_idx"]
                 g_list: List[List[int]] = []
-                g_groups = groups_dict[session_index]
-                for group in g_groups:
-                    idxs: List[int] = []
-                    for p in group.get_participants():
-                        # 参加者インデックスへ変換
-                        idxs.append(self._find_index_in_session(session, p))
-                    g_list.append(idxs)
+                for group in groups_dict[session_index]:
+                    g_list.append([id_to_idx.get(p.get_id().as_str(), 0) for p in group.get_participants()])
                 sols.append(g_list)
             return sols
 
@@ -63,108 +185,292 @@ class GroupAssignerHybridGA(GroupAssigner):
 
         # 不足分をランダム生成（ヒューリスティック個体を軽く撹拌）
         while len(population) < self.population_size:
-            base = random.choice(population)
-            population.append(self._mutate_indices(base, sessions_list, force=True))
-
-        start_time = time.time()
-        best = max(population, key=lambda ind: self._fitness(ind, sessions_list))
+            base = self.rng.choice(population)
+            population.append(self._mutate_indices(base, sessions_list, session_cache, force=True))
 
         # 3) GA ループ
-        for _ in range(self.generations):
-            scored = sorted(((self._fitness(ind, sessions_list), ind) for ind in population), reverse=True)
-            elites = [ind for (_, ind) in scored[: max(2, self.population_size // 4)]]
-            new_pop: List[List[List[List[int]]]] = elites.copy()
-
-            # 交叉＋突然変異
-            while len(new_pop) < self.population_size:
-                p1, p2 = random.sample(elites, 2) if len(elites) >= 2 else (best, random.choice(population))
-                child = self._crossover(p1, p2, sessions_list)
-                child = self._mutate_indices(child, sessions_list)
-                new_pop.append(child)
-
-            population = new_pop
-            cur_best = max(population, key=lambda ind: self._fitness(ind, sessions_list))
-            if self._fitness(cur_best, sessions_list) > self._fitness(best, sessions_list):
-                best = cur_best
-            if time.time() - start_time > self.time_budget_seconds:
-                break
+        if self.num_islands > 1:
+            deadline = time.time() + self.time_budget_seconds
+            _, best = self._run_islands(population, sessions_list, session_cache, fitness_arrays, deadline)
+        else:
+            # 適応度評価はマスター/スレーブ型で並列化できる（GA演算子はマスター側で逐次実行）
+            pool_context = (
+                ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    initializer=_init_fitness_worker,
+                    initargs=(fitness_arrays,),
+                )
+                if self.num_workers > 1
+                else nullcontext()
+            )
+            with pool_context as pool:
+                deadline = time.time() + self.time_budget_seconds
+                _, best = self._evolve(population, sessions_list, session_cache, fitness_arrays, pool, deadline)
 
         # 4) best 個体を Groups に変換して返却
         return self._indices_to_groups(best, sessions_list)
 
+    # ========= evolution =========
+    def _evolve(
+        self,
+        population: List[List[List[List[int]]]],
+        sessions_list,
+        session_cache: List[Dict[str, Any]],
+        fitness_arrays: Dict[str, Any],
+        pool: Optional[Executor],
+        deadline: float,
+        migrate=None,
+    ) -> Tuple[float, List[List[List[int]]]]:
+        """GA 本体。migrate(generation, scored) を渡すと世代末に移住処理を差し込める。"""
+        pop_size = len(population)
+        # 適応度は個体生成時に一度だけ評価し、(score, individual) の組で保持する
+        scored: List[Tuple[float, List[List[List[int]]]]] = list(
+            zip(self._evaluate(population, fitness_arrays, pool), population)
+        )
+        best_score, best = max(scored, key=lambda t: t[0])
+
+        for generation in range(self.generations):
+            # エリートは全体をソートせず上位のみ取り出す
+            elites = heapq.nlargest(max(2, pop_size // 4), scored, key=lambda t: t[0])
+
+            # 交叉＋突然変異（親はトーナメント選択、評価は新しい子のみ）
+            children: List[List[List[List[int]]]] = []
+            while len(elites) + len(children) < pop_size:
+                p1 = self._tournament(scored)
+                p2 = self._tournament(scored)
+                child = self._crossover(p1, p2, sessions_list, session_cache)
+                child = self._mutate_indices(child, sessions_list, session_cache)
+                children.append(child)
+
+            children_scored = list(zip(self._evaluate(children, fitness_arrays, pool), children))
+            scored = elites + children_scored
+            if migrate is not None:
+                scored = migrate(generation, scored)
+            # エリートと移住個体は評価済み（移住個体は送り元の島で最良判定済み）なので、新しい子だけと比較する
+            # （エリートだけで集団が埋まる設定では子が生まれない世代もある）
+            if children_scored:
+                cur_best_score, cur_best = max(children_scored, key=lambda t: t[0])
+                if cur_best_score > best_score:
+                    best_score, best = cur_best_score, cur_best
+            if time.time() > deadline:
+                break
+        return best_score, best
+
+    def _run_islands(
+        self,
+        population: List[List[List[List[int]]]],
+        sessions_list,
+        session_cache: List[Dict[str, Any]],
+        fitness_arrays: Dict[str, Any],
+        deadline: float,
+    ) -> Tuple[float, List[List[List[int]]]]:
+        """島モデル: 部分集団を別プロセスで進化させ、各島の最良解のうち最良を返す。"""
+        k = self.num_islands
+        island_size = max(4, self.population_size // k)
+        islands: List[List[List[List[List[int]]]]] = []
+        for i in range(k):
+            # 初期集団を島に振り分け、不足分は島内の個体を撹拌して補う
+            sub = population[i::k] or [self.rng.choice(population)]
+            while len(sub) < island_size:
+                sub.append(self._mutate_indices(self.rng.choice(sub), sessions_list, session_cache, force=True))
+            islands.append(sub[:island_size])
+
+        island_bests: List[Tuple[float, List[List[List[int]]]]] = run_islands(
+            self,
+            [(islands[i], sessions_list, session_cache, fitness_arrays, deadline) for i in range(k)],
+            [self.rng.randrange(2**32) for _ in range(k)],
+            deadline,
+        )
+        if not island_bests:
+            # どの島からも結果が無ければ、初期集団から 1 世代だけ進めた最良解を返す
+            return self._evolve(population, sessions_list, session_cache, fitness_arrays, None, time.time())
+        return max(island_bests, key=lambda t: t[0])
+
+    def _run_island(
+        self,
+        population: List[List[List[List[int]]]],
+        sessions_list,
+        session_cache: List[Dict[str, Any]],
+        fitness_arrays: Dict[str, Any],
+        deadline: float,
+        inbox,
+        outbox,
+    ) -> Tuple[float, List[List[List[int]]]]:
+        """1 つの島を進化させ、migration_interval 世代ごとに精鋭を次の島へ送る。"""
+
+        def migrate(generation: int, scored):
+            if (generation + 1) % self.migration_interval != 0:
+                return scored
+            ranked = sorted(scored, key=lambda t: t[0], reverse=True)
+            outbox.put(ranked[: self.migration_size])
+            # 届いている移住個体を待たずに取り込み、最下位と入れ替える
+            immigrants = receive_immigrants(inbox)[: len(ranked) - 1]
+            if immigrants:
+                ranked = ranked[: len(ranked) - len(immigrants)] + immigrants
+            return ranked
+
+        return self._evolve(population, sessions_list, session_cache, fitness_arrays, None, deadline, migrate)
+
     # ========= heuristic seeds =========
     def _make_heuristic_seeds(self, program: Program, num: int) -> List[Dict[int, Groups]]:
         seeds: List[Dict[int, Groups]] = []
-        for i in range(num):
-            random.seed(int(time.time() * 1000 + i) % 2**32)
-            heur = GroupAssignerHeuristic(max_iterations=self.heuristic_iterations)
+        for _ in range(num):
+            # グローバルな乱数状態を触らず、シードごとに self.rng から派生させた生成器を使う
+            heur = GroupAssignerHeuristic(max_iterations=self.heuristic_iterations, rng=random.Random(self.rng.getrandbits(64)))
             seeds.append(heur.assign_groups(program))
         return seeds
 
+    # ========= preprocessing =========
+    def _build_session_cache(self, sessions_list) -> List[Dict[str, Any]]:
+        """セッションごとの定数と参加者属性を配列化（GAループ中は不変）。
+        参加者IDはセッション横断で共通の整数IDへ、ラボは密な整数IDへ変換し、
+        参加者ごとの所属ラボを CSR (indptr, values) で保持する。"""
+        cache: List[Dict[str, Any]] = []
+        pid_id: Dict[str, int] = {}
+        lab_id: Dict[str, int] = {}
+        for session in sessions_list:
+            fc = session.get_participants()
+            indptr = [0]
+            values: List[int] = []
+            pids: List[int] = []
+            positions: List[PositionType] = []
+            id_to_idx: Dict[str, int] = {}
+            for i in range(fc.length()):
+                participant = fc.get_participant_by_index(i)
+                pid_str = participant.get_id().as_str()
+                id_to_idx.setdefault(pid_str, i)
+                pids.append(pid_id.setdefault(pid_str, len(pid_id)))
+                positions.append(participant.get_position())
+                for lab in participant.get_lab():
+                    values.append(lab_id.setdefault(lab, len(lab_id)))
+                indptr.append(len(values))
+            targets_enum = session.get_position_targets_as_enum() if session.has_position_targets() else None
+            is_fac = np.asarray([pos == PositionType.FACULTY for pos in positions], dtype=bool)
+            pos_codes = np.asarray([_POSITION_CODE[pos] for pos in positions], dtype=np.int8)
+            cache.append({
+                "id_to_idx": id_to_idx,
+                "pids": np.asarray(pids, dtype=np.int32),
+                "positions": positions,
+                "pos_codes": pos_codes,
+                "is_fac": is_fac,
+                "num_fac": int(is_fac.sum()),
+                "position_targets": targets_enum,
+                "lab_indptr": np.asarray(indptr, dtype=np.int32),
+                "lab_values": np.asarray(values, dtype=np.int16),
+                "min": session.get_min(),
+                "max": session.get_max(),
+                "group_num": session.get_group_num(),
+                "n": fc.length(),
+            })
+        for meta in cache:
+            meta["num_pids"] = len(pid_id)
+            meta["num_labs"] = len(lab_id)
+        return cache
+
+    def _build_fitness_arrays(self, session_cache: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """_fitness_core 用に全セッションの属性を連結した配列を作る。
+        セッション s の参加者 idx はスロット slot_off[s] + idx で参照する。"""
+        sizes = [meta["n"] for meta in session_cache]
+        slot_off = np.concatenate(([0], np.cumsum(sizes))).astype(np.int64)
+        lab_indptr = [np.zeros(1, dtype=np.int64)]
+        lab_base = 0
+        for meta in session_cache:
+            lab_indptr.append(meta["lab_indptr"][1:].astype(np.int64) + lab_base)
+            lab_base += int(meta["lab_indptr"][-1])
+        return {
+            "slot_off": slot_off[:-1].tolist(),
+            "slot_pid": np.concatenate([meta["pids"] for meta in session_cache]) if session_cache else np.zeros(0, dtype=np.int32),
+            "lab_indptr": np.concatenate(lab_indptr),
+            "lab_values": np.concatenate([meta["lab_values"] for meta in session_cache]) if session_cache else np.zeros(0, dtype=np.int16),
+            "mins": np.asarray([meta["min"] for meta in session_cache], dtype=np.int64),
+            "maxs": np.asarray([meta["max"] for meta in session_cache], dtype=np.int64),
+            "num_pids": session_cache[0]["num_pids"] if session_cache else 0,
+            "num_labs": session_cache[0]["num_labs"] if session_cache else 0,
+        }
+
     # ========= GA operators / helpers =========
-    def _fitness(self, individual: List[List[List[int]]], sessions_list) -> float:
-        """大きいほど良い。サイズ違反のない範囲で、ペア再会の少なさ・均等性・ラボ重複の少なさを評価。"""
+    def _tournament(
+        self,
+        population_with_fitness: List[Tuple[float, List[List[List[int]]]]],
+        k: int = 3,
+    ) -> List[List[List[int]]]:
+        """k個体を無作為に選び、最も適応度の高い個体を返すトーナメント選択。"""
+        picks = self.rng.sample(population_with_fitness, min(k, len(population_with_fitness)))
+        return max(picks, key=lambda t: t[0])[1]
+
+    def _evaluate(
+        self,
+        individuals: List[List[List[List[int]]]],
+        fitness_arrays: Dict[str, Any],
+        pool: Optional[Executor],
+    ) -> List[float]:
+        """個体群の適応度をまとめて評価する。評価済みの個体はキャッシュから返し、
+        未評価の個体だけを計算する（pool があればワーカーへ分配する）。"""
+        cache = self._fitness_cache
+        keys = [self._individual_key(ind) for ind in individuals]
+        misses = [i for i, key in enumerate(keys) if key not in cache]
+        # 同一世代内の重複個体は一度だけ評価する
+        miss_index: Dict[Tuple, int] = {}
+        for i in misses:
+            miss_index.setdefault(keys[i], i)
+        to_eval = [individuals[i] for i in miss_index.values()]
+        if pool is None:
+            scores = [self._fitness(ind, fitness_arrays) for ind in to_eval]
+        else:
+            chunksize = max(1, len(to_eval) // (4 * self.num_workers))
+            scores = list(pool.map(_fitness_worker, to_eval, chunksize=chunksize))
+        for key, score in zip(miss_index.keys(), scores):
+            cache[key] = score
+
+        results: List[float] = []
+        for key in keys:
+            cache.move_to_end(key)
+            results.append(cache[key])
+        while len(cache) > self.population_size * 4:
+            cache.popitem(last=False)
+        return results
+
+    @staticmethod
+    def _individual_key(individual: List[List[List[int]]]) -> Tuple:
+        """グループ内の順序・グループの並びに依存しない個体の正規形。"""
+        return tuple(
+            tuple(sorted(tuple(sorted(g)) for g in session_groups))
+            for session_groups in individual
+        )
+
+    @staticmethod
+    def _fitness(individual: List[List[List[int]]], fitness_arrays: Dict[str, Any]) -> float:
+        """大きいほど良い。サイズ違反のない範囲で、ペア再会の少なさ・均等性・ラボ重複の少なさを評価。
+        サイズ違反がある個体は違反数のみで評価する（他の罰則は計算しない）。"""
         W_SIZE = 1_000_000
         W_PAIR = 100
         W_SPREAD = 500  # 分散を強めに抑制
         W_RANGE = 100   # 最大-最小の偏りも抑制
         W_LAB = 5
 
-        from collections import defaultdict
-        import math
-
-        size_pen = 0.0
-        pair_pen = 0.0
-        spread_pen = 0.0
-        range_pen = 0.0
-        lab_pen = 0.0
-
-        mates = {}
-        together_count = defaultdict(int)
-
-        for s_idx, session in enumerate(sessions_list):
-            session_groups = individual[s_idx]
-
-            # サイズ違反
-            for g in session_groups:
-                if not (session.get_min() <= len(g) <= session.get_max()):
-                    size_pen += 1
-
-            # ペア/均等性/ラボ
-            for g in session_groups:
-                ids = []
-                for idx in g:
-                    pid = session.get_participants().get_participant_by_index(idx).get_id().as_str()
-                    mates.setdefault(pid, set())
-                    ids.append(pid)
-                for i in range(len(ids)):
-                    for j in range(i + 1, len(ids)):
-                        a, b = ids[i], ids[j]
-                        pair = tuple(sorted([a, b]))
-                        together_count[pair] += 1
-                        mates[a].add(b)
-                        mates[b].add(a)
-
-                # ラボ重複（累積罰）
-                lab_count = {}
-                for idx in g:
-                    for lab in session.get_participants().get_participant_by_index(idx).get_lab():
-                        lab_count[lab] = lab_count.get(lab, 0) + 1
-                for c in lab_count.values():
-                    if c > 1:
-                        lab_pen += (c - 1) * c // 2
-
-        for cnt in together_count.values():
-            if cnt > 1:
-                pair_pen += (cnt - 1) * cnt // 2
-
-        if mates:
-            counts = [len(s) for s in mates.values()]
-            avg = sum(counts) / len(counts)
-            var = sum((c - avg) ** 2 for c in counts) / len(counts)
-            spread_pen += var
-            if counts:
-                range_pen += (max(counts) - min(counts))
+        # 個体を (連結スロット, グループ境界, グループのセッション番号) の平坦な配列へ
+        group_sizes = [len(g) for session_groups in individual for g in session_groups]
+        members = np.fromiter(
+            (off + idx for off, session_groups in zip(fitness_arrays["slot_off"], individual) for g in session_groups for idx in g),
+            dtype=np.int64,
+            count=sum(group_sizes),
+        )
+        group_off = np.zeros(len(group_sizes) + 1, dtype=np.int64)
+        np.cumsum(group_sizes, out=group_off[1:])
+        group_session = np.repeat(np.arange(len(individual)), [len(session_groups) for session_groups in individual])
+
+        size_pen, pair_pen, spread_pen, range_pen, lab_pen = _fitness_core(
+            members,
+            group_off,
+            group_session,
+            fitness_arrays["slot_pid"],
+            fitness_arrays["lab_indptr"],
+            fitness_arrays["lab_values"],
+            fitness_arrays["mins"],
+            fitness_arrays["maxs"],
+            fitness_arrays["num_pids"],
+            fitness_arrays["num_labs"],
+        )
 
         total_penalty = (
             W_SIZE * size_pen +
@@ -175,22 +481,23 @@ class GroupAssignerHybridGA(GroupAssigner):
         )
         return -total_penalty
 
-    def _crossover(self, p1: List[List[List[int]]], p2: List[List[List[int]]], sessions_list) -> List[List[List[int]]]:
+    def _crossover(self, p1: List[List[List[int]]], p2: List[List[List[int]]], sessions_list, session_cache: List[Dict[str, Any]]) -> List[List[List[int]]]:
         """position一致のみ入替るポジションセーフ交叉。各グループについて、
         親1の職位別人数配分をターゲットとし、同職位の個体だけを親1/親2から選ぶ。"""
         child: List[List[List[int]]] = []
         for s_idx, session in enumerate(sessions_list):
-            gnum = session.get_group_num()
+            meta = session_cache[s_idx]
+            gnum = meta["group_num"]
             c_session: List[List[int]] = []
 
-            # ヘルパー: 職位取得と職位別バケット化
-            def pos_of(idx: int):
-                return session.get_participants().get_participant_by_index(idx).get_position()
+            positions = meta["positions"]
+            targets_enum = meta["position_targets"]
 
+            # ヘルパー: 職位別バケット化
             def by_pos(indices: List[int]):
                 buckets = {pos: [] for pos in PositionType}
                 for i in indices:
-                    buckets[pos_of(i)].append(i)
+                    buckets[positions[i]].append(i)
                 return buckets
 
             for g in range(gnum):
@@ -201,16 +508,14 @@ class GroupAssignerHybridGA(GroupAssigner):
 
                 # 目標職位配分は position_targets があればそれを使用、なければ親1に合わせる
                 target_counts = {pos: len(b1[pos]) for pos in PositionType}
-                if hasattr(session, "has_position_targets") and session.has_position_targets():
-                    targets_enum = session.get_position_targets_as_enum()
-                    if targets_enum is not None and g < len(targets_enum):
-                        # セッション入力に基づくターゲットを優先
-                        target_counts = {
-                            PositionType.FACULTY: targets_enum[g].get(PositionType.FACULTY, 0),
-                            PositionType.DOCTORAL: targets_enum[g].get(PositionType.DOCTORAL, 0),
-                            PositionType.MASTER: targets_enum[g].get(PositionType.MASTER, 0),
-                            PositionType.BACHELOR: targets_enum[g].get(PositionType.BACHELOR, 0),
-                        }
+                if targets_enum is not None and g < len(targets_enum):
+                    # セッション入力に基づくターゲットを優先
+                    target_counts = {
+                        PositionType.FACULTY: targets_enum[g].get(PositionType.FACULTY, 0),
+                        PositionType.DOCTORAL: targets_enum[g].get(PositionType.DOCTORAL, 0),
+                        PositionType.MASTER: targets_enum[g].get(PositionType.MASTER, 0),
+                        PositionType.BACHELOR: targets_enum[g].get(PositionType.BACHELOR, 0),
+                    }
 
                 # グループサイズはターゲット合計を優先（未指定時は親1サイズ）
                 target_size = sum(target_counts.values()) if sum(target_counts.values()) > 0 else len(g1)
@@ -220,7 +525,7 @@ class GroupAssignerHybridGA(GroupAssigner):
                 # 職位ごとに、親1/親2からランダムに抜き取り（同職位のみ）
                 for pos in PositionType:
                     pool = list(b1[pos]) + list(b2[pos])
-                    random.shuffle(pool)
+                    self.rng.shuffle(pool)
                     need = target_counts[pos]
                     for i in pool:
                         if need <= 0:
@@ -233,16 +538,16 @@ class GroupAssignerHybridGA(GroupAssigner):
 
                 # 足りない場合は、同職位をセッション全体から補完
                 if len(assembled) < target_size:
-                    all_indices = list(range(session.get_participants().length()))
-                    random.shuffle(all_indices)
+                    all_indices = list(range(meta["n"]))
+                    self.rng.shuffle(all_indices)
                     # 職位ごとの残数を更新
-                    remaining = {pos: target_counts[pos] - sum(1 for i in assembled if pos_of(i) == pos) for pos in PositionType}
+                    remaining = {pos: target_counts[pos] - sum(1 for i in assembled if positions[i] == pos) for pos in PositionType}
                     for i in all_indices:
                         if len(assembled) >= target_size:
                             break
                         if i in used:
                             continue
-                        p = pos_of(i)
+                        p = positions[i]
                         if remaining.get(p, 0) > 0:
                             assembled.append(i)
                             used.add(i)
@@ -250,61 +555,58 @@ class GroupAssignerHybridGA(GroupAssigner):
 
                 c_session.append(assembled)
 
-            child.append(self._repair_session(session, c_session))
+            child.append(self._repair_session(session, c_session, meta))
         return child
 
-    def _mutate_indices(self, individual: List[List[List[int]]], sessions_list, force: bool = False) -> List[List[List[int]]]:
+    def _mutate_indices(self, individual: List[List[List[int]]], sessions_list, session_cache: List[Dict[str, Any]], force: bool = False) -> List[List[List[int]]]:
         child = []
         for s_idx, session in enumerate(sessions_list):
+            pos_codes = session_cache[s_idx]["pos_codes"]
             groups = [list(g) for g in individual[s_idx]]
-            if force or random.random() < self.mutation_rate:
+            if force or self.rng.random() < self.mutation_rate:
                 if len(groups) >= 2:
-                    g1, g2 = random.sample(range(len(groups)), 2)
+                    g1, g2 = self.rng.sample(range(len(groups)), 2)
                     if groups[g1] and groups[g2]:
                         # 職位セーフ: 同一職位の候補からのみ入れ替え
-                        def pos_of(idx: int):
-                            return session.get_participants().get_participant_by_index(idx).get_position()
-                        # 職位ごとにインデックスを分類
-                        from collections import defaultdict
-                        by_pos_1 = defaultdict(list)
-                        by_pos_2 = defaultdict(list)
-                        for idx in groups[g1]:
-                            by_pos_1[pos_of(idx)].append(idx)
-                        for idx in groups[g2]:
-                            by_pos_2[pos_of(idx)].append(idx)
-                        # 共通の職位を抽出
-                        common_positions = [pos for pos in by_pos_1.keys() if by_pos_2.get(pos)]
-                        if common_positions:
-                            pos = random.choice(common_positions)
-                            a = random.choice(by_pos_1[pos])
-                            b = random.choice(by_pos_2[pos])
-                            i1 = groups[g1].index(a)
-                            i2 = groups[g2].index(b)
+                        # 職位コード配列上で共通の職位と入れ替え位置を直接求める（.index() 不要）
+                        codes1 = pos_codes[groups[g1]]
+                        codes2 = pos_codes[groups[g2]]
+                        common_codes = np.intersect1d(codes1, codes2)
+                        if common_codes.size:
+                            code = self.rng.choice(common_codes.tolist())
+                            i1 = self.rng.choice(np.flatnonzero(codes1 == code).tolist())
+                            i2 = self.rng.choice(np.flatnonzero(codes2 == code).tolist())
                             groups[g1][i1], groups[g2][i2] = groups[g2][i2], groups[g1][i1]
-            child.append(self._repair_session(session, groups))
+            child.append(self._repair_session(session, groups, session_cache[s_idx]))
         return child
 
-    def _repair_session(self, session, groups: List[List[int]]) -> List[List[int]]:
+    def _repair_session(self, session, groups: List[List[int]], meta: Dict[str, Any]) -> List[List[int]]:
         """重複排除と min/max を満たすよう軽い修復。"""
-        # 重複除去
-        seen = set()
-        for g in groups:
-            i = 0
-            while i < len(g):
-                if g[i] in seen:
-                    g.pop(i)
-                else:
-                    seen.add(g[i])
-                    i += 1
+        min_size = meta["min"]
+        max_size = meta["max"]
+        n_people = meta["n"]
+
+        # 出現回数を一括で数え、重複があるときだけ除去する
+        flat = np.fromiter(chain.from_iterable(groups), dtype=np.int64)
+        counts = np.bincount(flat, minlength=n_people)
+        if flat.size and counts.max() > 1:
+            seen = set()
+            for g in groups:
+                i = 0
+                while i < len(g):
+                    if g[i] in seen:
+                        g.pop(i)
+                    else:
+                        seen.add(g[i])
+                        i += 1
         # 未配置を回収
-        all_idx = list(range(session.get_participants().length()))
-        missing = [i for i in all_idx if i not in seen]
+        missing = np.flatnonzero(counts == 0).tolist()
 
         # 小さいグループから順に補充
         groups_sorted = sorted(range(len(groups)), key=lambda k: len(groups[k]))
         for idx in missing:
             for gi in groups_sorted:
-                if len(groups[gi]) < session.get_max():
+                if len(groups[gi]) < max_size:
                     groups[gi].append(idx)
                     break
 
@@ -312,91 +614,71 @@ class GroupAssignerHybridGA(GroupAssigner):
         changed = True
         while changed:
             changed = False
-            bigs = [i for i, g in enumerate(groups) if len(g) > session.get_max()]
-            smalls = [i for i, g in enumerate(groups) if len(g) < session.get_min()]
+            bigs = [i for i, g in enumerate(groups) if len(g) > max_size]
+            smalls = [i for i, g in enumerate(groups) if len(g) < min_size]
             if not bigs and not smalls:
                 break
             for bi in bigs:
                 for si in smalls:
-                    if groups[bi] and len(groups[si]) < session.get_min():
+                    if groups[bi] and len(groups[si]) < min_size:
                         groups[si].append(groups[bi].pop())
                         changed = True
                         break
 
         # Faculty の均等化（Faculty人数 >= グループ数のときは各グループに1名を目標）
-        def is_fac(idx: int) -> bool:
-            return (
-                session.get_participants()
-                .get_participant_by_index(idx)
-                .get_position()
-                == PositionType.FACULTY
-            )
-
-        total_fac = sum(1 for i in range(session.get_participants().length()) if is_fac(i))
-        if total_fac >= len(groups):
+        is_fac_arr = meta["is_fac"]
+        if meta["num_fac"] >= len(groups):
+            # グループごとのFaculty人数を一度だけ数え、移動/交換のたびに差分更新する
+            fac_counts = [int(np.count_nonzero(is_fac_arr[g])) if g else 0 for g in groups]
             # 受け手（0名のグループ）と供与側（2名以上のグループ）を作る
-            def fac_count(g: List[int]) -> int:
-                return sum(1 for i in g if is_fac(i))
-
-            receivers = [gi for gi, g in enumerate(groups) if fac_count(g) == 0]
-            donors = [gi for gi, g in enumerate(groups) if fac_count(g) >= 2]
+            receivers = [gi for gi, c in enumerate(fac_counts) if c == 0]
+            donors = [gi for gi, c in enumerate(fac_counts) if c >= 2]
 
             # 繰り返し調整
             guard = 0
             while receivers and donors and guard < 100:
                 gi = donors.pop(0)
                 gj = receivers.pop(0)
-                # donorからFacultyを1名取り出し
-                fac_idx = next((k for k, idx in enumerate(groups[gi]) if is_fac(idx)), None)
-                if fac_idx is None:
-                    guard += 1
-                    continue
+                # donorからFacultyを1名取り出し（donorは2名以上なので必ず見つかる）
+                fac_idx = next(k for k, idx in enumerate(groups[gi]) if is_fac_arr[idx])
                 moving = groups[gi][fac_idx]
 
                 # サイズ制約を満たすように移動/交換
-                if len(groups[gj]) < session.get_max() and len(groups[gi]) > session.get_min():
+                if len(groups[gj]) < max_size and len(groups[gi]) > min_size:
                     # そのまま移動
                     groups[gi].pop(fac_idx)
                     groups[gj].append(moving)
                 else:
-                    # 交換: receiver から非Facultyを一人受け取る
-                    non_fac_k = next((k for k, idx in enumerate(groups[gj]) if not is_fac(idx)), None)
-                    if non_fac_k is None:
+                    # 交換: receiver から非Facultyを一人受け取る（receiverは0名なので先頭でよい）
+                    if not groups[gj]:
                         # 交換できない場合はスキップ
                         guard += 1
                         continue
-                    groups[gj][non_fac_k], groups[gi][fac_idx] = groups[gi][fac_idx], groups[gj][non_fac_k]
+                    groups[gj][0], groups[gi][fac_idx] = groups[gi][fac_idx], groups[gj][0]
+                fac_counts[gi] -= 1
+                fac_counts[gj] += 1
 
-                # 更新後に再度 donors/receivers を再計算
+                # 更新後に donors/receivers を差分で更新
                 receivers = [x for x in receivers if x != gj]
                 donors = [x for x in donors if x != gi]
-                if fac_count(groups[gj]) == 0:
+                if fac_counts[gj] == 0:
                     receivers.append(gj)
-                if fac_count(groups[gi]) >= 2:
+                if fac_counts[gi] >= 2:
                     donors.append(gi)
                 guard += 1
 
         return groups
 
     # ========= conversion =========
-    def _find_index_in_session(self, session, participant) -> int:
-        fc = session.get_participants()
-        for i in range(fc.length()):
-            if fc.get_participant_by_index(i).get_id().as_str() == participant.get_id().as_str():
-                return i
-        # フォールバック（理論上到達しない想定）
-        return 0
-
     def _indices_to_groups(self, individual: List[List[List[int]]], sessions_list) -> Dict[int, Groups]:
         results: Dict[int, Groups] = {}
         for s_idx, session in enumerate(sessions_list):
-            group_objs = Groups.empty()
-            for g in individual[s_idx]:
-                ps = Participants.empty()
-                for idx in g:
-                    ps = ps.add_participant(session.get_participants().get_participant_by_index(idx))
-                group_objs = group_objs.add_group(Group.create(ps))
-            results[s_idx] = group_objs
+            fc = session.get_participants()
+            # add_* は毎回リストを複製するため、グループ単位でまとめて構築する
+            results[s_idx] = Groups.of([
+                Group.create(Participants.of([fc.get_participant_by_index(idx) for idx in g]))
+                for g in individual[s_idx]
+            ])
         return results
 
 
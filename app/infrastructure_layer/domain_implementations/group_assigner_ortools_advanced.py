@@ -1,231 +1,47 @@
-import logging
-from typing import Dict, List, Tuple
-from collections import defaultdict
-
 from ortools.sat.python import cp_model
 
-from ...domain_layer.services.group_assigner import GroupAssigner
-from ...domain_layer.entities.program import Program
-from ...domain_layer.first_class_collections.participants import Participants
-from ...domain_layer.first_class_collections.groups import Groups
-from ...domain_layer.entities.group import Group
-from ...domain_layer.entities.participant import PositionType
+from .group_assigner_ortools_base import GroupAssignerORToolsBase, _POSITIONS
 
-logger = logging.getLogger(__name__)
 
-class GroupAssignerORToolsAdvanced(GroupAssigner):
+class GroupAssignerORToolsAdvanced(GroupAssignerORToolsBase):
     """
     Advanced Group assigner using OR-Tools Constraint Programming (CP).
     Based on the provided reference implementation.
     """
-    
-    def assign_groups(self, program: Program) -> Dict[int, Groups]:
-        """
-        OR-Toolsを使用してグループ割り当てを実行
-        """
-        sessions = program.get_sessions()
-        sessions_list = [s for s in sessions]
-        
-        results: Dict[int, Groups] = {}
-        
-        for session_index, session in enumerate(sessions_list):
-            logger.info(f"Processing session {session_index}")
-            
-            # セッションごとにグループ割り当てを実行
-            session_groups = self._assign_groups_for_session(session)
-            
-            # Groupsオブジェクトに変換
-            group_objs = Groups.empty()
-            for group in session_groups:
-                ps = Participants.empty()
-                for p_index in group:
-                    ps = ps.add_participant(session.get_participants().get_participant_by_index(p_index))
-                group_objs = group_objs.add_group(Group.create(ps))
-            
-            results[session_index] = group_objs
-        
-        return results
-    
-    def _assign_groups_for_session(self, session) -> List[List[int]]:
-        """
-        単一セッションのグループ割り当てを実行
-        """
-        participants_fc = session.get_participants()
-        N_PEOPLE = participants_fc.length()
-        N_SESSIONS = 1  # 単一セッション
-        GROUP_SIZE = session.get_max()  # 最大グループサイズ
-        N_GROUPS = session.get_group_num()
-        
-        # 各人の属性を取得
-        positions = []
-        labs = []
-        for i in range(N_PEOPLE):
-            participant = participants_fc.get_participant_by_index(i)
-            positions.append(participant.get_position())
-            # ラボ情報を数値IDに変換
-            lab_names = participant.get_lab()
-            if lab_names and len(lab_names) > 0:
-                # LaboratoryNameは__iter__を実装しているので、リストとして扱える
-                first_lab = list(lab_names)[0] if lab_names else "default"
-                labs.append(hash(first_lab) % 10)
-            else:
-                labs.append(0)
-        
-        # CPモデルを作成
-        model = cp_model.CpModel()
-        
-        # 変数 x[p,s,g] = 1 if person p in session s group g
-        x = {}
-        for p in range(N_PEOPLE):
-            for s in range(N_SESSIONS):
-                for g in range(N_GROUPS):
-                    x[p, s, g] = model.NewBoolVar(f"x_{p}_{s}_{g}")
-        
-        # 各人は各セッションで1つのグループに所属
-        for p in range(N_PEOPLE):
-            for s in range(N_SESSIONS):
-                model.Add(sum(x[p, s, g] for g in range(N_GROUPS)) == 1)
-        
-        # 各グループのサイズ制約
-        for s in range(N_SESSIONS):
-            for g in range(N_GROUPS):
-                min_size = session.get_min()
-                max_size = session.get_max()
-                model.Add(sum(x[p, s, g] for p in range(N_PEOPLE)) >= min_size)
-                model.Add(sum(x[p, s, g] for p in range(N_PEOPLE)) <= max_size)
-        
-        # ペア変数 y[p,q,s] - 同じグループにいるかどうか
-        y = {}
-        for p in range(N_PEOPLE):
-            for q in range(p + 1, N_PEOPLE):
-                for s in range(N_SESSIONS):
-                    y[p, q, s] = model.NewBoolVar(f"y_{p}_{q}_{s}")
-                    # y[p,q,s] = 1 iff p and q are in the same group in session s
-                    for g in range(N_GROUPS):
-                        model.Add(y[p, q, s] >= x[p, s, g] + x[q, s, g] - 1)
-                    model.Add(y[p, q, s] <= sum(x[p, s, g] for g in range(N_GROUPS)))
-                    model.Add(y[p, q, s] <= sum(x[q, s, g] for g in range(N_GROUPS)))
-        
-        # グローバル制約の適用（Domain Constraint 依存なし）
-        # 1) 教員必須（可能な限り）
-        for g in range(N_GROUPS):
-            faculty_count = sum(
-                x[p, 0, g] for p in range(N_PEOPLE)
-                if positions[p] == PositionType.FACULTY
-            )
-            model.Add(faculty_count >= 1)
 
-        # 2) 職位バランス: 過半数抑止（4人の場合は最大2人）
-        for g in range(N_GROUPS):
-            for pos in PositionType:
-                pos_count = sum(
-                    x[p, 0, g] for p in range(N_PEOPLE)
-                    if positions[p] == pos
-                )
-                model.Add(pos_count <= 2)
+    _TIME_LIMIT_SECONDS = 60  # 60秒のタイムアウト
 
-        # 3) ラボバランス: 同一ラボは最大2名
-        for g in range(N_GROUPS):
-            for lab in set(labs):
-                lab_count = sum(
-                    x[p, 0, g] for p in range(N_PEOPLE)
-                    if labs[p] == lab
-                )
-                model.Add(lab_count <= 2)
-        
-        # 目的関数の設定
-        self._set_advanced_objective_function(model, x, y, positions, labs, N_PEOPLE, N_GROUPS)
-        
-        # ソルバー実行
-        solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 60  # 60秒のタイムアウト
-        solver.parameters.num_search_workers = 8
-        
-        status = solver.Solve(model)
-        
-        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
-            logger.info(f"Solution found: {status}")
-            return self._extract_solution(solver, x, N_PEOPLE, N_GROUPS)
-        else:
-            logger.warning(f"No solution found: {status}")
-            # フォールバック: シンプルな割り当て
-            return self._fallback_assignment(session)
-    
-    # constraints removed
-    
-    def _set_advanced_objective_function(self, model, x, y, positions, labs, N_PEOPLE, N_GROUPS):
+    def _set_objective_function(self, model, x, pos_to_ps, lab_to_ps, pair_terms, N_GROUPS):
         """
         高度な目的関数を設定
         """
-        obj_terms = []
-        
-        # ペア重複の最小化（最も重要）
-        for p in range(N_PEOPLE):
-            for q in range(p + 1, N_PEOPLE):
-                obj_terms.append(y[p, q, 0])
+        # ペア重複: このセッションで同席するペア数と、過去セッションで同席済みのペアの再会回数
+        # （全ペアの y[p,q,s] は持たず、グループごとの C(size, 2) と履歴のあるペアの z[p,q,g] で表す）
+        # 目的関数は (変数, 整数重み) で集め、最後に WeightedSum で一度に組み立てる
+        obj_vars = [var for var, _ in pair_terms]
+        obj_weights = [weight for _, weight in pair_terms]
         
         # ラボ違反ペナルティ
         for g in range(N_GROUPS):
-            for lab in set(labs):
-                lab_count = sum(
-                    x[p, 0, g] for p in range(N_PEOPLE) 
-                    if labs[p] == lab
-                )
+            for lab, lab_ps in lab_to_ps.items():
+                lab_count = cp_model.LinearExpr.Sum(x[lab_ps, g].tolist())
                 # 上限2を超える場合のペナルティ
                 excess = model.NewIntVar(0, 4, f"excess_{lab}_{g}")
+                # excess の下限は0なので、この1本で excess >= max(0, lab_count - 2) となる（最小化で等号）
                 model.Add(excess >= lab_count - 2)
-                model.Add(excess <= lab_count - 2).OnlyEnforceIf(
-                    model.NewBoolVar(f"over_limit_{lab}_{g}")
-                )
-                obj_terms.append(excess)
+                obj_vars.append(excess)
+                obj_weights.append(1)
         
         # 職位バランスのペナルティ
         for g in range(N_GROUPS):
-            for pos in PositionType:
-                pos_count = sum(
-                    x[p, 0, g] for p in range(N_PEOPLE) 
-                    if positions[p] == pos
-                )
+            for pos in _POSITIONS:
+                pos_count = cp_model.LinearExpr.Sum(x[pos_to_ps[pos], g].tolist())
                 # 理想的な配分からの偏差
                 ideal = 1  # 各職位1人ずつが理想的
-                deviation = model.NewIntVar(0, 4, f"dev_{pos}_{g}")
-                model.Add(deviation >= pos_count - ideal)
-                model.Add(deviation >= ideal - pos_count)
-                obj_terms.append(deviation)
-        
-        model.Minimize(sum(obj_terms))
-    
-    def _extract_solution(self, solver, x, N_PEOPLE, N_GROUPS) -> List[List[int]]:
-        """
-        ソルバーの解からグループ割り当てを抽出
-        """
-        groups = [[] for _ in range(N_GROUPS)]
-        
-        for p in range(N_PEOPLE):
-            for g in range(N_GROUPS):
-                if solver.Value(x[p, 0, g]) == 1:
-                    groups[g].append(p)
-        
-        return groups
-    
-    def _fallback_assignment(self, session) -> List[List[int]]:
-        """
-        フォールバック: シンプルな割り当て
-        """
-        participants_fc = session.get_participants()
-        N_PEOPLE = participants_fc.length()
-        N_GROUPS = session.get_group_num()
-        
-        # 参加者をインデックスで分割
-        indices = list(range(N_PEOPLE))
-        group_size = N_PEOPLE // N_GROUPS
-        remainder = N_PEOPLE % N_GROUPS
-        
-        groups = []
-        start = 0
-        for g in range(N_GROUPS):
-            end = start + group_size + (1 if g < remainder else 0)
-            groups.append(indices[start:end])
-            start = end
+                deviation = model.NewIntVar(0, 4, f"dev_{pos.name}_{g}")
+                # |pos_count - ideal| を2本の不等式ではなくネイティブの絶対値制約で表す
+                model.AddAbsEquality(deviation, pos_count - ideal)
+                obj_vars.append(deviation)
+                obj_weights.append(1)
         
-        return groups
+        model.Minimize(cp_model.LinearExpr.WeightedSum(obj_vars, obj_weights))
@@ -0,0 +1,404 @@
+from collections import defaultdict
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from ortools.sat.python import cp_model
+
+from ...domain_layer.services.group_assigner import GroupAssigner
+from ...domain_layer.entities.program import Program
+from ...domain_layer.first_class_collections.participants import Participants
+from ...domain_layer.first_class_collections.groups import Groups
+from ...domain_layer.entities.group import Group
+from ...domain_layer.entities.participant import PositionType
+from .group_assigner_heuristic import GroupAssignerHeuristic
+
+logger = logging.getLogger(__name__)
+
+# 職位の列挙と整数コード（制約生成のループで毎回 Enum を走査しない）
+_POSITIONS: Tuple[PositionType, ...] = tuple(PositionType)
+_POSITION_CODE: Dict[PositionType, int] = {pos: code for code, pos in enumerate(_POSITIONS)}
+
+
+def _at_most_k(model: cp_model.CpModel, lits: List[cp_model.IntVar], k: int) -> None:
+    """
+    ブール変数の個数制約 sum(lits) <= k を追加する（リテラル数が k 以下なら常に満たされるので作らない）
+    """
+    if len(lits) <= k:
+        return
+    model.AddLinearConstraint(cp_model.LinearExpr.Sum(lits), 0, k)
+
+class GroupAssignerORToolsBase(GroupAssigner):
+    """
+    OR-Tools (CP-SAT) 版アサイナーの共通部分。
+    モデル構築・ヒント・同席履歴・並列実行・求解を持ち、派生クラスは目的関数と上限・制限時間だけを定める。
+    """
+
+    # 1グループ内の同職位・同ラボの人数上限
+    _POSITION_CAP = 2
+    _LAB_CAP = 2
+    # ソルバーの制限時間（秒）
+    _TIME_LIMIT_SECONDS = 30
+
+    def __init__(self, hint_iterations: int = 200, num_session_workers: int = 1):
+        # ソルバーに与えるヒント解を作るヒューリスティックの反復回数
+        self.hint_iterations = hint_iterations
+        # セッションを並列に解くプロセス数（1 なら逐次）。
+        # 2以上では解き終えたセッションの同席履歴を使えないため、他セッションのヒント解の同席を履歴の代わりに罰する
+        self.num_session_workers = num_session_workers
+    
+    def assign_groups(self, program: Program) -> Dict[int, Groups]:
+        """
+        OR-Toolsを使用してグループ割り当てを実行
+        """
+        sessions = program.get_sessions()
+        sessions_list = [s for s in sessions]
+        
+        results: Dict[int, Groups] = {}
+        
+        # ヒューリスティック解をCP-SATの初期解ヒントとして使う
+        hint_solution = GroupAssignerHeuristic(max_iterations=self.hint_iterations).assign_groups(program)
+        # 解き終えたセッションでの同席回数（参加者IDの組 -> 回数）。以降のセッションで再会を罰する
+        pair_history: Dict[Tuple[str, str], int] = defaultdict(int)
+        # セッション設定 -> 目的関数を除いた制約モデル（セッション間で使い回す）
+        base_models: Dict[tuple, tuple] = {}
+        # 並列モードでは全セッションを先にまとめて解いておく
+        parallel_groups = None
+        if self.num_session_workers > 1 and len(sessions_list) > 1:
+            parallel_groups = self._solve_sessions_in_parallel(sessions_list, hint_solution)
+        
+        for session_index, session in enumerate(sessions):
+            logger.info(f"Processing session {session_index}")
+            
+            # セッションごとにグループ割り当てを実行
+            if parallel_groups is not None:
+                session_groups = parallel_groups[session_index]
+            else:
+                session_groups = self._assign_groups_for_session(
+                    session, hint_solution.get(session_index), pair_history, base_models
+                )
+            
+            # Groupsオブジェクトに変換
+            # add_* は毎回リストを複製するため、グループ単位でまとめて構築する
+            # 参加者リストとIDは一度だけ取り出し、以降はインデックスで直接参照する
+            members = list(session.get_participants())
+            member_ids = [participant.get_id().as_str() for participant in members]
+            group_objs = Groups.of([
+                Group.create(Participants.of([members[p_index] for p_index in group]))
+                for group in session_groups
+            ])
+            
+            results[session_index] = group_objs
+            
+            # 同席履歴を更新
+            for group in session_groups:
+                group_ids = sorted(member_ids[p_index] for p_index in group)
+                for pair in combinations(group_ids, 2):
+                    pair_history[pair] += 1
+        
+        return results
+    
+    def _assign_groups_for_session(
+        self,
+        session,
+        hint: Optional[Groups] = None,
+        pair_history: Optional[Dict[Tuple[str, str], int]] = None,
+        base_models: Optional[Dict[tuple, tuple]] = None,
+        num_workers: Optional[int] = None,
+    ) -> List[List[int]]:
+        """
+        単一セッションのグループ割り当てを実行
+        """
+        participants_fc = session.get_participants()
+        N_PEOPLE = participants_fc.length()
+        N_GROUPS = session.get_group_num()
+        min_size = session.get_min()
+        max_size = session.get_max()
+        
+        # 同じ参加者・グループ設定のセッションでは、制約まで組んだモデルを複製して再利用する
+        key = (
+            tuple(p.get_id().as_str() for p in participants_fc),
+            N_GROUPS,
+            min_size,
+            max_size,
+        )
+        if base_models is None:
+            base_models = {}
+        if key not in base_models:
+            base_models[key] = self._build_base_model(session)
+        base_model, base_x, base_group_pairs, pos_to_ps, lab_to_ps = base_models[key]
+        model = base_model.clone()
+        x = np.empty(base_x.shape, dtype=object)
+        for p, g in np.ndindex(base_x.shape):
+            x[p, g] = model.get_bool_var_from_proto_index(base_x[p, g].Index())
+        group_pairs = [model.get_int_var_from_proto_index(v.Index()) for v in base_group_pairs]
+        
+        # ヒューリスティック解をヒントとして与える
+        if hint is not None:
+            self._add_solution_hint(model, x, participants_fc, hint, N_PEOPLE, N_GROUPS)
+        
+        # 目的関数の設定
+        # ペアの項: このセッションで同席するペア数（グループごとに C(size, 2)）と、過去セッションで同席したペアの再会罰則
+        # 前者はサイズの二乗和に比例するので、グループサイズを均等に揃える圧力にもなる
+        pair_terms = [(pairs, 1) for pairs in group_pairs]
+        if pair_history:
+            pair_terms += self._pair_history_terms(model, x, participants_fc, pair_history, N_PEOPLE, N_GROUPS)
+        self._set_objective_function(model, x, pos_to_ps, lab_to_ps, pair_terms, N_GROUPS)
+        
+        # ソルバー実行
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = self._TIME_LIMIT_SECONDS
+        # ポートフォリオ探索（LNSを含む複数ワーカー）を利用
+        # CP-SAT のポートフォリオは16ワーカー程度で調整されているため、それを上限とする
+        if num_workers is None:
+            num_workers = min(16, os.cpu_count() or 8)
+        solver.parameters.num_workers = num_workers
+        solver.parameters.search_branching = cp_model.PORTFOLIO_SEARCH
+        solver.parameters.use_lns_only = False
+        solver.parameters.linearization_level = 2
+        solver.parameters.cp_model_presolve = True
+        solver.parameters.symmetry_level = 2
+        solver.parameters.optimize_with_core = True
+        # ビンパッキング型のモデルではプロービングの前処理が重いので1段階下げる
+        solver.parameters.cp_model_probing_level = 1
+        solver.parameters.log_search_progress = logger.isEnabledFor(logging.DEBUG)
+        
+        status = solver.Solve(model)
+        
+        if status in [cp_model.OPTIMAL, cp_model.FEASIBLE]:
+            logger.info(f"Solution found: {status}")
+            return self._extract_solution(solver, x, N_PEOPLE, N_GROUPS)
+        else:
+            logger.warning(f"No solution found: {status}")
+            # フォールバック: シンプルな割り当て
+            return self._fallback_assignment(session)
+    
+    def _solve_sessions_in_parallel(self, sessions_list, hint_solution: Dict[int, Groups]) -> List[List[List[int]]]:
+        """
+        各セッションを別プロセスで独立に解く。CP-SAT のワーカー数はプロセス間で分け合い、合計をコア数に収める。
+        他セッションの解は求解中に分からないため、代わりに他セッションのヒント解（セッション横断で再会を避けて作られている）
+        での同席を同席履歴として罰し、各セッションの解が互いに別の組み合わせへ散るようにする
+        """
+        logger.warning(
+            "Solving sessions in parallel: repeated pairs across sessions are only discouraged via the heuristic hints, "
+            "not controlled as in sequential mode"
+        )
+        # セッションごとのヒント解での同席ペア（参加者IDの組 -> 回数）
+        hint_pairs: List[Dict[Tuple[str, str], int]] = []
+        for session_index in range(len(sessions_list)):
+            pairs: Dict[Tuple[str, str], int] = defaultdict(int)
+            for group in hint_solution.get(session_index) or []:
+                group_ids = sorted(p.get_id().as_str() for p in group.get_participants())
+                for pair in combinations(group_ids, 2):
+                    pairs[pair] += 1
+            hint_pairs.append(pairs)
+        
+        n_procs = min(self.num_session_workers, len(sessions_list))
+        num_workers = max(1, min(16, (os.cpu_count() or 8) // n_procs))
+        with ProcessPoolExecutor(max_workers=n_procs) as executor:
+            futures = []
+            for session_index, session in enumerate(sessions_list):
+                # 自セッション以外のヒント解での同席回数を合算したものを、このセッションの同席履歴とする
+                pair_history: Dict[Tuple[str, str], int] = defaultdict(int)
+                for other_index, pairs in enumerate(hint_pairs):
+                    if other_index == session_index:
+                        continue
+                    for pair, count in pairs.items():
+                        pair_history[pair] += count
+                futures.append(executor.submit(
+                    self._assign_groups_for_session,
+                    session, hint_solution.get(session_index), dict(pair_history), None, num_workers,
+                ))
+            return [future.result() for future in futures]
+    
+    def _build_base_model(self, session) -> tuple:
+        """
+        変数 x と制約までを組んだモデルを作成。目的関数とヒントはセッションごとに複製先へ追加する
+        """
+        participants_fc = session.get_participants()
+        N_PEOPLE = participants_fc.length()
+        N_GROUPS = session.get_group_num()
+        min_size = session.get_min()
+        max_size = session.get_max()
+        
+        # 各人の属性を一度の走査で配列化（職位コードと、ラボIDの CSR 形式）
+        position_codes, lab_indptr, lab_ids = self._participant_arrays(participants_fc)
+        
+        # 職位・ラボごとの参加者インデックスを前計算（制約生成のたびに全員をフィルタしない）
+        pos_to_ps = {
+            pos: np.flatnonzero(position_codes == code).tolist()
+            for code, pos in enumerate(_POSITIONS)
+        }
+        lab_owner = np.repeat(np.arange(N_PEOPLE), np.diff(lab_indptr))
+        # ラボIDで安定ソートして一度に切り分ける（ラボごとに全件のマスクを作らない）
+        order = np.argsort(lab_ids, kind="stable")
+        labs, starts = np.unique(lab_ids[order], return_index=True)
+        lab_to_ps = {
+            lab: members.tolist()
+            for lab, members in zip(labs.tolist(), np.split(lab_owner[order], starts[1:]))
+        }
+        faculty_ps = pos_to_ps[PositionType.FACULTY]
+        
+        # CPモデルを作成
+        model = cp_model.CpModel()
+        
+        # 変数 x[p,g] = 1 if person p in group g（単一セッション）
+        # 2次元のオブジェクト配列で持ち、行・列のスライスをそのまま制約に渡す
+        x = np.empty((N_PEOPLE, N_GROUPS), dtype=object)
+        for p, g in np.ndindex(x.shape):
+            x[p, g] = model.NewBoolVar(f"x_{p}_{g}")
+        
+        # 固定探索では参加者順にグループへ割り当てを確定させていく
+        model.AddDecisionStrategy(
+            x.ravel().tolist(),
+            cp_model.CHOOSE_FIRST,
+            cp_model.SELECT_MAX_VALUE,
+        )
+        
+        # 各人は1つのグループに所属
+        # （Python の sum() で式を組み立てず、リストを渡すネイティブの制約を使う）
+        for p in range(N_PEOPLE):
+            model.AddExactlyOne(x[p].tolist())
+        
+        # 各グループのサイズ制約（サイズ変数の定義域を min..max にする）と、グループ内のペア数 C(size, 2)
+        # ペア数は全ペアの y[p,q] を持たず、サイズからの表引き (AddElement) で求める
+        pair_table = [k * (k - 1) // 2 for k in range(max_size + 1)]
+        group_pairs = []
+        for g in range(N_GROUPS):
+            size = model.NewIntVar(min_size, max_size, f"size_{g}")
+            model.Add(size == cp_model.LinearExpr.Sum(x[:, g].tolist()))
+            pairs = model.NewIntVar(pair_table[min_size], pair_table[max_size], f"pairs_{g}")
+            model.AddElement(size, pair_table, pairs)
+            group_pairs.append(pairs)
+        
+        # 対称性の除去: グループは区別されないので、各グループの最小インデックスの昇順に並べる
+        # （空グループの最小インデックスは N_PEOPLE とみなす。空を許さないときは狭義単調）
+        first_prev = None
+        for g in range(N_GROUPS):
+            first_in_g = model.NewIntVar(0, N_PEOPLE, f"first_{g}")
+            model.AddMinEquality(
+                first_in_g,
+                [p * x[p, g] + N_PEOPLE * (1 - x[p, g]) for p in range(N_PEOPLE)],
+            )
+            if first_prev is not None:
+                if min_size >= 1:
+                    model.Add(first_prev < first_in_g)
+                else:
+                    model.Add(first_prev <= first_in_g)
+            first_prev = first_in_g
+        
+        # グローバル制約の適用（Domain Constraint 依存なし）
+        # 1) 教員必須（可能な限り）
+        # 「少なくとも1人」は線形和ではなく節 (BoolOr) として SAT 側で直接扱わせる
+        for g in range(N_GROUPS):
+            model.AddBoolOr(x[faculty_ps, g].tolist())
+
+        # 2) 職位バランス: 同職位は最大 _POSITION_CAP 名
+        for g in range(N_GROUPS):
+            for pos in _POSITIONS:
+                _at_most_k(model, x[pos_to_ps[pos], g].tolist(), self._POSITION_CAP)
+
+        # 3) ラボバランス: 同一ラボは最大 _LAB_CAP 名
+        for g in range(N_GROUPS):
+            for lab, lab_ps in lab_to_ps.items():
+                _at_most_k(model, x[lab_ps, g].tolist(), self._LAB_CAP)
+        
+        return model, x, group_pairs, pos_to_ps, lab_to_ps
+    
+    def _set_objective_function(self, model, x, pos_to_ps, lab_to_ps, pair_terms, N_GROUPS):
+        """
+        目的関数を設定（派生クラスで実装）。pair_terms は (ペア数の変数, 重み) の組で、
+        このセッションのグループ内ペア数と、過去に同席したペアの再会回数を含む
+        """
+        raise NotImplementedError
+    
+    def _participant_arrays(self, participants_fc) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        参加者の職位コード (int8) と所属ラボID (CSR: indptr, ids) を一度の走査で作る。
+        ラボ名はセッション内で密な整数IDに変換し、兼任者は所属する全ラボを持つ
+        """
+        lab_encoder: Dict[str, int] = {}
+        codes: List[int] = []
+        indptr: List[int] = [0]
+        ids: List[int] = []
+        for participant in participants_fc:
+            codes.append(_POSITION_CODE[participant.get_position()])
+            ids.extend(sorted({lab_encoder.setdefault(lab, len(lab_encoder)) for lab in participant.get_lab()}))
+            indptr.append(len(ids))
+        return (
+            np.asarray(codes, dtype=np.int8),
+            np.asarray(indptr, dtype=np.int32),
+            np.asarray(ids, dtype=np.int32),
+        )
+    
+    def _pair_history_terms(self, model, x, participants_fc, pair_history, N_PEOPLE, N_GROUPS) -> List[Tuple[cp_model.IntVar, int]]:
+        """
+        過去に同席したペア (p, q) について z[p,q,g] = x[p,g] AND x[q,g] を作り、
+        (変数, 同席回数) の組を返す
+        """
+        ids = [participants_fc.get_participant_by_index(i).get_id().as_str() for i in range(N_PEOPLE)]
+        terms = []
+        for p, q in combinations(range(N_PEOPLE), 2):
+            count = pair_history.get((ids[p], ids[q]) if ids[p] < ids[q] else (ids[q], ids[p]), 0)
+            if count == 0:
+                continue
+            for g in range(N_GROUPS):
+                z = model.NewBoolVar(f"z_{p}_{q}_{g}")
+                model.AddBoolAnd([x[p, g], x[q, g]]).OnlyEnforceIf(z)
+                model.AddBoolOr([x[p, g].Not(), x[q, g].Not(), z])
+                terms.append((z, count))
+        return terms
+    
+    def _add_solution_hint(self, model, x, participants_fc, hint: Groups, N_PEOPLE, N_GROUPS):
+        """
+        ヒューリスティック解を x[p,g] のヒントとして設定
+        """
+        id_to_idx = {
+            participants_fc.get_participant_by_index(i).get_id().as_str(): i
+            for i in range(N_PEOPLE)
+        }
+        hint_groups = []
+        for group in hint:
+            hint_groups.append([
+                id_to_idx[p.get_id().as_str()]
+                for p in group.get_participants()
+                if p.get_id().as_str() in id_to_idx
+            ])
+        # 対称性除去（最小インデックスの昇順）と整合するようにグループを並べ替える
+        hint_groups.sort(key=lambda group: min(group, default=N_PEOPLE))
+        
+        hinted_group = {}
+        for g, group in enumerate(hint_groups[:N_GROUPS]):
+            for p in group:
+                hinted_group[p] = g
+        
+        for p in range(N_PEOPLE):
+            for g in range(N_GROUPS):
+                model.AddHint(x[p, g], hinted_group.get(p) == g)
+    
+    def _extract_solution(self, solver, x, N_PEOPLE, N_GROUPS) -> List[List[int]]:
+        """
+        ソルバーの解からグループ割り当てを抽出
+        """
+        groups = [[] for _ in range(N_GROUPS)]
+        
+        for p in range(N_PEOPLE):
+            for g in range(N_GROUPS):
+                if solver.Value(x[p, g]) == 1:
+                    groups[g].append(p)
+        
+        return groups
+    
+    def _fallback_assignment(self, session) -> List[List[int]]:
+        """
+        フォールバック: シンプルな割り当て
+        """
+        participants_fc = session.get_participants()
+        N_PEOPLE = participants_fc.length()
+        N_GROUPS = session.get_group_num()
+        
+        # 参加者をインデックス順に、先頭のグループほど1人多くなるよう等分割
+        return [chunk.tolist() for chunk in np.array_split(np.arange(N_PEOPLE), N_GROUPS)]
@@ -1,8 +1,15 @@
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import heapq
 import random
 import logging
 import math
+import os
 import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from numba import njit
 
 from ...domain_layer.services.group_assigner import GroupAssigner
 from ...domain_layer.entities.program import Program
@@ -10,92 +17,519 @@ from ...domain_layer.first_class_collections.participants import Participants
 from ...domain_layer.first_class_collections.groups import Groups
 from ...domain_layer.entities.group import Group
 from ...domain_layer.entities.participant import PositionType
+from .island_model import receive_immigrants, run_islands
 
 logger = logging.getLogger(__name__)
 
+# 職位の列挙と整数コード（参加者の職位は int8 の配列で持つ）
+_POSITIONS = tuple(PositionType)
+_POSITION_CODE = {pos: code for code, pos in enumerate(_POSITIONS)}
+_N_POSITIONS = len(_POSITIONS)
+_FACULTY_CODE = _POSITION_CODE[PositionType.FACULTY]
+
+
+@njit(cache=True)
+def _fitness_core(
+    individual, session_n, session_g, slot_off, slot_gid, slot_pos, lab_indptr, lab_values,
+    mins, maxs, num_pids, num_labs, num_positions, faculty_code,
+):
+    """適応度の罰則項を整数配列だけで計算する JIT カーネル。
+    individual は (セッション, 参加者) ごとのグループ番号（-1 は未所属または詰め物）、
+    session_n / session_g は各セッションの参加者数とグループ数。セッション s の参加者 idx はスロット slot_off[s] + idx。
+    戻り値: (size_pen, req_pen, pos_pen, pair_pen, spread_pen, lab_pen)"""
+    n_sessions = individual.shape[0]
+
+    together = np.zeros(max(1, num_pids * (num_pids - 1) // 2), dtype=np.int32)
+    distinct = np.zeros(num_pids, dtype=np.int64)
+    present = np.zeros(num_pids, dtype=np.bool_)
+    lab_count = np.zeros(max(1, num_labs), dtype=np.int32)
+    pos_count = np.zeros(num_positions, dtype=np.int64)
+    members = np.empty(individual.shape[1], dtype=np.int64)
+
+    size_pen = 0
+    req_pen = 0
+    pos_pen = 0
+    pair_pen = 0
+    lab_pen = 0
+    for s in range(n_sessions):
+        n = session_n[s]
+        n_groups = session_g[s]
+
+        # グループ番号で数え上げソートし、members[group_off[g]:group_off[g+1]] をグループ g のスロットにする
+        group_off = np.zeros(n_groups + 1, dtype=np.int64)
+        for i in range(n):
+            g = individual[s, i]
+            if 0 <= g < n_groups:
+                group_off[g + 1] += 1
+        for g in range(n_groups):
+            group_off[g + 1] += group_off[g]
+        fill = group_off[:n_groups].copy()
+        for i in range(n):
+            g = individual[s, i]
+            if 0 <= g < n_groups:
+                members[fill[g]] = slot_off[s] + i
+                fill[g] += 1
+
+        for g in range(n_groups):
+            start = group_off[g]
+            end = group_off[g + 1]
+            size = end - start
+
+            # サイズ違反
+            if size < mins[s] or size > maxs[s]:
+                size_pen += 1
+
+            pos_count[:] = 0
+            for i in range(start, end):
+                slot = members[i]
+                pos_count[slot_pos[slot]] += 1
+                a = slot_gid[slot]
+                present[a] = True
+                # ペア回数: 三角配列 together[a,b] (a<b)。c回目の再会で c-1 を加算 → Σ c(c-1)/2
+                for j in range(i + 1, end):
+                    b = slot_gid[members[j]]
+                    if a == b:
+                        continue
+                    lo = min(a, b)
+                    hi = max(a, b)
+                    k = lo * num_pids - lo * (lo + 1) // 2 + (hi - lo - 1)
+                    c = together[k]
+                    if c == 0:
+                        distinct[lo] += 1
+                        distinct[hi] += 1
+                    pair_pen += c
+                    together[k] = c + 1
+                # ラボ重複も同様に累積（同一ラボ c 人で c(c-1)/2）
+                for l in range(lab_indptr[slot], lab_indptr[slot + 1]):
+                    lab = lab_values[l]
+                    lab_pen += lab_count[lab]
+                    lab_count[lab] += 1
+            for i in range(start, end):
+                slot = members[i]
+                for l in range(lab_indptr[slot], lab_indptr[slot + 1]):
+                    lab_count[lab_values[l]] = 0
+
+            # 教員必須
+            if pos_count[faculty_code] < 1:
+                req_pen += 1
+
+            # 職位バランス（過半数超過＋偏り）
+            limit = (max(1, size) + 1) // 2
+            over = 0
+            max_c = pos_count[0]
+            min_c = pos_count[0]
+            for k in range(num_positions):
+                over += max(0, pos_count[k] - limit)
+                max_c = max(max_c, pos_count[k])
+                min_c = min(min_c, pos_count[k])
+            pos_pen += 10 * over + 2 * (max_c - min_c)
+
+    # 異なる同席人数の分散（均等性）
+    n_present = 0
+    total = 0.0
+    for p in range(num_pids):
+        if present[p]:
+            n_present += 1
+            total += distinct[p]
+    spread_pen = 0.0
+    if n_present > 0:
+        avg = total / n_present
+        for p in range(num_pids):
+            if present[p]:
+                spread_pen += (distinct[p] - avg) ** 2
+        spread_pen /= n_present
+    return size_pen, req_pen, pos_pen, pair_pen, spread_pen, lab_pen
+
+
+@njit(cache=True)
+def _size_req_penalty(individual, session_n, session_g, slot_off, slot_pos, mins, maxs, faculty_code):
+    """サイズ違反と教員不在のグループ数だけを数える（ペア・ラボ等の集計をしない安価な前処理）。
+    戻り値: (size_pen, req_pen)"""
+    size_pen = 0
+    req_pen = 0
+    for s in range(individual.shape[0]):
+        n_groups = session_g[s]
+        sizes = np.zeros(n_groups, dtype=np.int64)
+        faculty = np.zeros(n_groups, dtype=np.int64)
+        for i in range(session_n[s]):
+            g = individual[s, i]
+            if 0 <= g < n_groups:
+                sizes[g] += 1
+                if slot_pos[slot_off[s] + i] == faculty_code:
+                    faculty[g] += 1
+        for g in range(n_groups):
+            if sizes[g] < mins[s] or sizes[g] > maxs[s]:
+                size_pen += 1
+            if faculty[g] < 1:
+                req_pen += 1
+    return size_pen, req_pen
+
+
+@njit(cache=True)
+def _fitness_batch(
+    population, keep, weights, session_n, session_g, slot_off, slot_gid, slot_pos, lab_indptr, lab_values,
+    mins, maxs, num_pids, num_labs, num_positions, faculty_code,
+):
+    """個体群 (個体, セッション, 参加者) の適応度（= -重みつき罰則和）を一度の呼び出しでまとめて計算する。
+    weights は (size, req, pos, pair, spread, lab) の重み。
+    上位 keep 件に入り得ない個体は、サイズ・教員要件の罰則だけから求めた上界を返して残りの集計を省く
+    （上界の高い順に厳密に評価し、上界が厳密値の keep 番目を下回った時点で打ち切る）。"""
+    n_individuals = population.shape[0]
+    scores = np.empty(n_individuals, dtype=np.float64)
+    for i in range(n_individuals):
+        size_pen, req_pen = _size_req_penalty(
+            population[i], session_n, session_g, slot_off, slot_pos, mins, maxs, faculty_code,
+        )
+        scores[i] = -(weights[0] * size_pen + weights[1] * req_pen)
+
+    # top は厳密値の上位 keep 件（降順）
+    keep = max(1, min(keep, n_individuals))
+    top = np.empty(keep, dtype=np.float64)
+    n_top = 0
+    for i in np.argsort(-scores, kind="mergesort"):
+        if n_top == keep and scores[i] < top[keep - 1]:
+            break
+        size_pen, req_pen, pos_pen, pair_pen, spread_pen, lab_pen = _fitness_core(
+            population[i], session_n, session_g, slot_off, slot_gid, slot_pos, lab_indptr, lab_values,
+            mins, maxs, num_pids, num_labs, num_positions, faculty_code,
+        )
+        total_penalty = (
+            weights[0] * size_pen + weights[1] * req_pen + weights[2] * pos_pen
+            + weights[3] * pair_pen + weights[4] * spread_pen + weights[5] * lab_pen
+        )
+        score = -total_penalty
+        scores[i] = score
+        # 挿入ソートで上位 keep 件を保つ
+        k = min(n_top, keep - 1)
+        if n_top < keep or score > top[k]:
+            while k > 0 and top[k - 1] < score:
+                top[k] = top[k - 1]
+                k -= 1
+            top[k] = score
+            n_top = min(n_top + 1, keep)
+    return scores
+
+
+def _score_population(population: np.ndarray, fitness_arrays: Dict[str, Any], keep: Optional[int] = None) -> np.ndarray:
+    """
+    個体群の適応度（最大化）をまとめて返す。重みづけ: Position最優先 > ペア再会 > Lab重複。
+    罰則は大きいほど悪いので、最終的に -total_penalty を返す。
+    keep を指定すると厳密な値は上位 keep 件に入り得る個体だけになり、他は上界（それでも上位 keep 件より小さい）になる。
+    """
+    # 重み（階層的優先度を表現）
+    W_SIZE   = 1_000_000    # サイズ違反は致命的
+    W_REQ    = 10_000       # ファカルティ要件（グローバル制約）
+    W_POS    = 0            # 職位は交叉/修復で担保するため評価から除外
+    W_PAIR   = 100          # 次に重要（同一ペア再会の少なさ）
+    W_SPREAD = 40           # 異なる同席人数の分散（均等性）
+    W_LAB    = 5            # 最後に重要（ラボ重複）
+
+    weights = np.array([W_SIZE, W_REQ, W_POS, W_PAIR, W_SPREAD, W_LAB], dtype=np.float64)
+    return _fitness_batch(
+        population, population.shape[0] if keep is None else keep, weights,
+        fitness_arrays["session_n"], fitness_arrays["session_g"], fitness_arrays["slot_off"],
+        fitness_arrays["slot_gid"], fitness_arrays["slot_pos"],
+        fitness_arrays["lab_indptr"], fitness_arrays["lab_values"],
+        fitness_arrays["mins"], fitness_arrays["maxs"],
+        fitness_arrays["num_pids"], fitness_arrays["num_labs"],
+        _N_POSITIONS, _FACULTY_CODE,
+    )
+
+
+@njit(cache=True)
+def _last_member(labels, pos, g, code):
+    """グループ g に居る職位 code の参加者のうちインデックス最大の者（居なければ -1）"""
+    for i in range(labels.shape[0] - 1, -1, -1):
+        if labels[i] == g and pos[i] == code:
+            return i
+    return -1
+
+
+@njit(cache=True)
+def _hamilton_targets(sizes, totals):
+    """グループサイズに比例する職位ごとの目標人数 (グループ数, 職位数)。
+    Hamilton 配分: floor(share) の後、余りを端数の大きいグループへ（同値はインデックス順）"""
+    n_groups = sizes.shape[0]
+    n_positions = totals.shape[0]
+    n_total = max(1, sizes.sum())
+    targets = np.zeros((n_groups, n_positions), dtype=np.int64)
+    frac = np.zeros(n_groups, dtype=np.float64)
+    for k in range(n_positions):
+        assigned = 0
+        for g in range(n_groups):
+            share = sizes[g] * totals[k] / n_total
+            targets[g, k] = int(share)
+            frac[g] = share - targets[g, k]
+            assigned += targets[g, k]
+        rem = totals[k] - assigned
+        if rem > 0:
+            order = np.argsort(-frac, kind="mergesort")
+            for r in range(min(rem, n_groups)):
+                targets[order[r], k] += 1
+    return targets
+
+
+@njit(cache=True)
+def _repair_labels(labels, pos, totals, n_groups, min_size, max_size):
+    """1セッション分のグループ番号 labels をその場で修復し、各グループの職位人数を目標へ近づける。
+    目標はグループサイズに比例する Hamilton 配分。入れ替えを優先し、サイズに余裕があれば移動する（最大200回）。
+    動かす参加者は、グループ内でその職位を持つ者のうちインデックス最大の者。"""
+    n_positions = totals.shape[0]
+    counts = np.zeros((n_groups, n_positions), dtype=np.int64)
+    sizes = np.zeros(n_groups, dtype=np.int64)
+    for i in range(labels.shape[0]):
+        g = labels[i]
+        if 0 <= g < n_groups:
+            counts[g, pos[i]] += 1
+            sizes[g] += 1
+    targets = _hamilton_targets(sizes, totals)
+
+    for _ in range(200):
+        done = True
+        for g in range(n_groups):
+            for k in range(n_positions):
+                if counts[g, k] != targets[g, k]:
+                    done = False
+        if done:
+            break
+        changed = False
+
+        # 入れ替え: g1 の余剰職位 pa と g2 の余剰職位 pb を、互いの不足を埋める向きで交換
+        for g1 in range(n_groups):
+            has_excess = False
+            for k in range(n_positions):
+                if counts[g1, k] > targets[g1, k]:
+                    has_excess = True
+            if not has_excess:
+                continue
+            for g2 in range(n_groups):
+                if g1 == g2:
+                    continue
+                has_diff = False
+                for k in range(n_positions):
+                    if counts[g2, k] != targets[g2, k]:
+                        has_diff = True
+                if not has_diff:
+                    continue
+                for pa in range(n_positions):
+                    if counts[g1, pa] <= targets[g1, pa]:
+                        continue
+                    for pb in range(n_positions):
+                        if counts[g1, pb] >= targets[g1, pb]:
+                            continue
+                        if counts[g2, pb] > targets[g2, pb] and counts[g2, pa] < targets[g2, pa]:
+                            ia = _last_member(labels, pos, g1, pa)
+                            ib = _last_member(labels, pos, g2, pb)
+                            labels[ia] = g2
+                            labels[ib] = g1
+                            counts[g1, pa] -= 1
+                            counts[g1, pb] += 1
+                            counts[g2, pb] -= 1
+                            counts[g2, pa] += 1
+                            changed = True
+                            break
+                    if changed:
+                        break
+                if changed:
+                    break
+            if changed:
+                break
+        if changed:
+            continue
+
+        # 移動: サイズの許す範囲で、g1 の余剰職位を不足している g2 へ1人移す
+        for g1 in range(n_groups):
+            if sizes[g1] <= min_size:
+                continue
+            has_excess = False
+            for k in range(n_positions):
+                if counts[g1, k] > targets[g1, k]:
+                    has_excess = True
+            if not has_excess:
+                continue
+            for g2 in range(n_groups):
+                if g1 == g2 or sizes[g2] >= max_size:
+                    continue
+                for pa in range(n_positions):
+                    if counts[g1, pa] > targets[g1, pa] and counts[g2, pa] < targets[g2, pa]:
+                        labels[_last_member(labels, pos, g1, pa)] = g2
+                        counts[g1, pa] -= 1
+                        counts[g2, pa] += 1
+                        sizes[g1] -= 1
+                        sizes[g2] += 1
+                        changed = True
+                        break
+                if changed:
+                    break
+            if changed:
+                break
+        if not changed:
+            break
+
+
+# プロセスプール上のワーカーが参照する読み取り専用の配列（initializer で一度だけ配布）
+_WORKER_FITNESS_ARRAYS: Optional[Dict[str, Any]] = None
+
+
+def _init_fitness_worker(fitness_arrays: Dict[str, Any]) -> None:
+    global _WORKER_FITNESS_ARRAYS
+    _WORKER_FITNESS_ARRAYS = fitness_arrays
+
+
+def _fitness_worker(population: np.ndarray, keep: Optional[int] = None) -> np.ndarray:
+    return _score_population(population, _WORKER_FITNESS_ARRAYS, keep)
+
+
 class GroupAssignerGA(GroupAssigner):
     """
     Group assigner using Genetic Algorithm (GA).
     """
+    def __init__(
+        self,
+        population_size: int = 50,
+        generations: int = 2000,
+        mutation_rate: float = 0.05,
+        time_budget_seconds: float = 2.0,
+        num_workers: Optional[int] = 1,
+        num_islands: int = 1,
+        migration_interval: int = 50,
+        migration_size: int = 2,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        self.population_size = population_size
+        self.generations = generations
+        self.mutation_rate = mutation_rate
+        self.time_budget_seconds = time_budget_seconds
+        # 適応度評価の並列プロセス数（1 なら逐次、None なら CPU コア数）
+        self.num_workers = num_workers if num_workers is not None else (os.cpu_count() or 1)
+        # 島モデル: num_islands > 1 なら集団を分割して各島を別プロセスで進化させ、リング状に精鋭を移住させる
+        self.num_islands = num_islands
+        self.migration_interval = migration_interval
+        self.migration_size = migration_size
+        # GA 内の乱数はすべてこのインスタンスから引く（未指定なら実行ごとに新しく作る）
+        self.rng = rng
+
     def assign_groups(self, program: Program) -> dict[int, Groups]:
+        if self.num_islands > 1:
+            _, results = self._run_islands(program)
+        else:
+            _, results = self._evolve(program)
+        return results
+
+    def _run_islands(self, program: Program) -> Tuple[float, dict[int, Groups]]:
+        """島モデル: 各島を別プロセスで進化させ、各島の最良解のうち最良を返す。"""
+        k = self.num_islands
+        deadline = time.time() + self.time_budget_seconds
+        seeder = self.rng if self.rng is not None else random
+        island_bests = run_islands(
+            self, [(program, deadline)] * k, [seeder.randrange(2**32) for _ in range(k)], deadline
+        )
+        if not island_bests:
+            # どの島からも結果が無ければ、この場で 1 世代だけ進めた最良解を返す
+            return self._evolve(program, time.time())
+        return max(island_bests, key=lambda t: t[0])
+
+    def _run_island(self, program: Program, deadline: float, inbox, outbox) -> Tuple[float, dict[int, Groups]]:
+        """1 つの島を進化させ、migration_interval 世代ごとに精鋭を次の島へ送る。"""
+
+        def migrate(generation, scored):
+            if (generation + 1) % self.migration_interval != 0:
+                return scored
+            outbox.put(scored[: self.migration_size])
+            # 届いている移住個体を待たずに取り込み、最下位と入れ替える
+            immigrants = receive_immigrants(inbox)[: len(scored) - 1]
+            if immigrants:
+                scored = sorted(scored[: len(scored) - len(immigrants)] + immigrants, key=lambda t: t[0], reverse=True)
+            return scored
+
+        return self._evolve(program, deadline, migrate)
+
+    def _evolve(self, program: Program, deadline: Optional[float] = None, migrate=None) -> Tuple[float, dict[int, Groups]]:
+        """
+        GA 本体。戻り値は (最良個体の適応度, セッション番号 -> Groups)。
+        migrate(generation, scored) を渡すと、次世代の親になる上位の (score, individual) の列（適応度順）を世代ごとに差し替えられる。
+        """
         sessions = program.get_sessions()
         sessions_list = [s for s in sessions]
 
+        # 参加者の属性はGA中に不変なので、セッションごとに一度だけ配列化しておく
+        # pos: 職位コード (int8), pos_counts: 職位コードごとの人数, pid: 参加者ID, lab: 所属ラボ
+        session_meta = []
+        for session in sessions_list:
+            participants = list(session.get_participants())
+            pos = np.fromiter(
+                (_POSITION_CODE[p.get_position()] for p in participants), dtype=np.int8, count=len(participants)
+            )
+            pos_counts = np.bincount(pos, minlength=_N_POSITIONS)
+            session_meta.append({
+                "pos": pos,
+                "pos_counts": pos_counts.astype(np.int64),
+                "pid": [p.get_id().as_str() for p in participants],
+                "lab": [list(p.get_lab()) for p in participants],
+            })
+
+        # セッションをまたいだ参加者の通し番号 gid（ペアを整数キー a * n_people + b で表すため）
+        global_index = {}
+        for meta in session_meta:
+            meta["gid"] = np.fromiter(
+                (global_index.setdefault(p, len(global_index)) for p in meta["pid"]),
+                dtype=np.int64,
+                count=len(meta["pid"]),
+            )
+        n_people = len(global_index)
+
+        # 適応度カーネル用に全セッションの属性を連結する。セッション s の参加者 idx はスロット slot_off[s] + idx
+        slot_off = np.zeros(len(session_meta) + 1, dtype=np.int64)
+        slot_off[1:] = np.cumsum([len(meta["pid"]) for meta in session_meta])
+        # ラボ名は通し番号に変換し、各スロットの所属ラボを CSR 形式 (lab_indptr, lab_values) で持つ
+        lab_encoder = {}
+        lab_indptr = [0]
+        lab_values = []
+        for meta in session_meta:
+            for labs in meta["lab"]:
+                lab_values.extend(sorted({lab_encoder.setdefault(lab, len(lab_encoder)) for lab in labs}))
+                lab_indptr.append(len(lab_values))
+        fitness_arrays = {
+            "slot_off": slot_off,
+            "slot_gid": np.concatenate([meta["gid"] for meta in session_meta] + [np.zeros(0, dtype=np.int64)]),
+            "slot_pos": np.concatenate([meta["pos"] for meta in session_meta] + [np.zeros(0, dtype=np.int8)]),
+            "lab_indptr": np.asarray(lab_indptr, dtype=np.int64),
+            "lab_values": np.asarray(lab_values, dtype=np.int64),
+            "mins": np.asarray([session.get_min() for session in sessions_list], dtype=np.int64),
+            "maxs": np.asarray([session.get_max() for session in sessions_list], dtype=np.int64),
+            "num_pids": n_people,
+            "num_labs": len(lab_encoder),
+        }
+
         # Utility: compute per-group targets per position based on group sizes
-        def compute_position_targets(session, group_sizes):
+        def compute_position_targets(meta, group_sizes):
             # 2次元のアポーション: cell[g][pos] = floor(share), 余りは各posの大きいfrac順に、かつ各groupのサイズ上限まで割当
-            participants_fc = session.get_participants()
-            total_by_pos = {pos: 0 for pos in PositionType}
-            for i in range(participants_fc.length()):
-                total_by_pos[participants_fc.get_participant_by_index(i).get_position()] += 1
-            N = sum(group_sizes)
-
-            G = len(group_sizes)
-            # 初期化
-            cell_base = [{pos: 0 for pos in PositionType} for _ in range(G)]
-            cell_frac = [{pos: 0.0 for pos in PositionType} for _ in range(G)]
-            row_sum = [0 for _ in range(G)]
-            rem_pos = {pos: total_by_pos[pos] for pos in PositionType}
-
-            # floor割当とfrac保存
-            for gi, gsize in enumerate(group_sizes):
-                for pos, T in total_by_pos.items():
-                    share = (T * gsize) / max(1, N)
-                    b = int(share)
-                    f = share - b
-                    cell_base[gi][pos] = b
-                    cell_frac[gi][pos] = f
-                    row_sum[gi] += b
-                    rem_pos[pos] -= b
+            sizes = np.asarray(group_sizes, dtype=np.int64)
+            totals = meta["pos_counts"]
+
+            # floor割当とfrac保存（行: グループ, 列: 職位）
+            share = np.outer(sizes, totals) / max(1, int(sizes.sum()))
+            cell = share.astype(np.int64)
+            frac = share - cell
+            row_sum = cell.sum(axis=1)
+            rem_pos = totals - cell.sum(axis=0)
 
             # 余りを各posごとにfrac降順で、かつ行の容量内で配分
-            for pos in PositionType:
-                if rem_pos[pos] <= 0:
-                    continue
-                # frac大きい順のgroupインデックス
-                order = sorted(range(G), key=lambda gi: cell_frac[gi][pos], reverse=True)
-                idx = 0
-                guard = 0
-                while rem_pos[pos] > 0 and guard < 10000:
-                    gi = order[idx]
-                    if row_sum[gi] < group_sizes[gi]:
-                        cell_base[gi][pos] += 1
-                        row_sum[gi] += 1
-                        rem_pos[pos] -= 1
-                    idx = (idx + 1) % G
-                    guard += 1
-
-            # 最終チェック: 行和はgroup_sizesに一致、列和はtotal_by_posに一致のはず
-            return cell_base
-
-        def build_groups_from_targets(session, targets, source_by_pos):
-            # source_by_pos: pos -> list of indices available (unique), already shuffled
-            participants_fc = session.get_participants()
-            fallback_by_pos = {pos: [] for pos in PositionType}
-            for i in range(participants_fc.length()):
-                p = participants_fc.get_participant_by_index(i)
-                fallback_by_pos[p.get_position()].append(i)
-            # Remove already present indices from fallback
-            present = set([idx for lst in source_by_pos.values() for idx in lst])
-            for pos in PositionType:
-                fallback_by_pos[pos] = [i for i in fallback_by_pos[pos] if i not in present]
-
-            groups = [[] for _ in range(len(targets))]
-            for gi, target in enumerate(targets):
-                for pos, need in target.items():
-                    for _ in range(need):
-                        if source_by_pos.get(pos) and len(source_by_pos[pos]) > 0:
-                            groups[gi].append(source_by_pos[pos].pop())
-                        elif fallback_by_pos[pos]:
-                            groups[gi].append(fallback_by_pos[pos].pop())
-                        else:
-                            # fallback: pick any remaining index of same pos from other groups if any
-                            for sj in range(len(groups)):
-                                if sj == gi:
-                                    continue
-                                # try to steal from future allocations (rare)
-                                pass
-            return groups
+            # （容量の残る行へ frac 順に1つずつ配る周回を、余りか容量が尽きるまで繰り返す）
+            for code in range(_N_POSITIONS):
+                # frac大きい順のgroupインデックス（同値はインデックス順）
+                order = np.argsort(-frac[:, code], kind="stable")
+                while rem_pos[code] > 0:
+                    open_rows = order[row_sum[order] < sizes[order]][:rem_pos[code]]
+                    if open_rows.size == 0:
+                        break
+                    cell[open_rows, code] += 1
+                    row_sum[open_rows] += 1
+                    rem_pos[code] -= open_rows.size
+
+            # 最終チェック: 行和はgroup_sizesに一致、列和はpos_countsに一致のはず
+            # targets[g, code] -> int（職位は _POSITIONS の順のコードで引く）
+            return cell
 
         def equal_group_sizes(session):
             # 参加人数 N からグループ数 G を G = ceil(N/4) で決定（5人を出さない）。
@@ -104,7 +538,6 @@ class GroupAssignerGA(GroupAssigner):
             max_sz = session.get_max()
 
             # 5人を避けたい場合は G は少なくとも ceil(N/4)
-            import math
             G = max(1, math.ceil(N / 4))
 
             # 均等配分（q, r で qかq+1のみ）
@@ -122,390 +555,211 @@ class GroupAssignerGA(GroupAssigner):
             return sizes
         # participants = program.get_participants()
 
-        population_size = 50
-        generations = 2000
-        mutation_rate = 0.05
-        time_budget_seconds = 2.0
-        start_time = time.time()
+        # グループサイズと職位ごとの目標人数はセッションの設定だけで決まるので、GA の前に一度だけ求める
+        session_sizes = [equal_group_sizes(session) for session in sessions_list]
+        session_targets = [
+            compute_position_targets(meta, sizes) for meta, sizes in zip(session_meta, session_sizes)
+        ]
+        # 職位ごとの参加者インデックス。個体を作るたびにこの配列自体をその場でシャッフルして使い回す
+        session_idx_by_pos = [
+            [np.flatnonzero(meta["pos"] == code) for code in range(_N_POSITIONS)]
+            for meta in session_meta
+        ]
+        # 職位ごとに、シャッフルした参加者の先頭から順に書き込むグループ番号（グループ g を目標人数ぶん並べたもの）
+        session_fill = [
+            [np.repeat(np.arange(len(targets), dtype=np.int16), targets[:, code]) for code in range(_N_POSITIONS)]
+            for targets in session_targets
+        ]
+
+        # 構築直後の行は職位人数が session_targets に一致し、突然変異（同職位の入れ替え）でも人数は変わらない。
+        # その目標が修復の目標（現サイズでの Hamilton 配分）と同じセッションでは修復は常に何もしないので省く
+        session_needs_repair = []
+        for meta, targets in zip(session_meta, session_targets):
+            session_needs_repair.append(
+                not np.array_equal(_hamilton_targets(targets.sum(axis=1), meta["pos_counts"]), targets)
+            )
+
+        # 個体は (セッション, 参加者) ごとのグループ番号を持つ int16 の2次元配列で表す（-1 は未所属、行末は詰め物）
+        n_sessions = len(session_meta)
+        session_n = np.asarray([len(meta["pid"]) for meta in session_meta], dtype=np.int64)
+        session_g = np.asarray([len(sizes) for sizes in session_sizes], dtype=np.int64)
+        n_max = int(session_n.max()) if n_sessions else 0
+        fitness_arrays["session_n"] = session_n
+        fitness_arrays["session_g"] = session_g
+
+        # 島モデルでは全体の集団を島の数で分ける
+        population_size = max(4, self.population_size // self.num_islands)
+        generations = self.generations
+        mutation_rate = self.mutation_rate
+        tournament_size = 3
+        if deadline is None:
+            deadline = time.time() + self.time_budget_seconds
+        # グローバルな random を共有せず、ローカルの乱数生成器を使う。
+        # 突然変異の判定と親の選択は NumPy の生成器でまとめて引く
+        rng = self.rng if self.rng is not None else random.Random()
+        np_rng = np.random.default_rng(rng.getrandbits(64))
+
+        def fill_session(row, session_index, present=None):
+            # 職位ごとに参加者をシャッフルし、各グループへ目標人数ずつグループ番号を書き込む。
+            # present を渡すと、そこに含まれない参加者は含まれる参加者を使い切った後に（インデックスの大きい順で）補う
+            for code in range(_N_POSITIONS):
+                fill = session_fill[session_index][code]
+                if fill.size == 0:
+                    continue
+                src = session_idx_by_pos[session_index][code]
+                if present is None:
+                    np_rng.shuffle(src)
+                    row[src[:fill.size]] = fill
+                else:
+                    mask = present[src]
+                    order = src[mask]
+                    np_rng.shuffle(order)
+                    order = np.concatenate((order, np.sort(src[~mask])[::-1]))
+                    row[order[:fill.size]] = fill
 
         def create_individual():
             """
             全てのセッションを表現する個体を生成
-            形式: list[list[list[ParticipantId]]]
+            形式: np.ndarray[int16] (セッション数, 最大参加者数)
             """
 
-            individual = []
-            for session in sessions:
+            individual = np.full((n_sessions, n_max), -1, dtype=np.int16)
+            for session_index in range(n_sessions):
                 # 初期個体: 職位ごとに均等配分となるように構築
-                group_sizes = equal_group_sizes(session)
-                targets = compute_position_targets(session, group_sizes)
-                # build source_by_pos from all participants
-                source_by_pos = {pos: [] for pos in PositionType}
-                participants_fc = session.get_participants()
-                for i in range(participants_fc.length()):
-                    pos = participants_fc.get_participant_by_index(i).get_position()
-                    source_by_pos[pos].append(i)
-                for pos in PositionType:
-                    random.shuffle(source_by_pos[pos])
-                session_groups = build_groups_from_targets(session, targets, source_by_pos)
-                individual.append(session_groups)
+                fill_session(individual[session_index], session_index)
             return individual
         
-        def repair_session_groups(session, session_groups):
-            # Compute desired group sizes (keep current sizes)
-            group_sizes = [len(g) for g in session_groups]
-            N = sum(group_sizes)
-            participants_fc = session.get_participants()
-
-            # Map p_index -> position
-            pos_by_index = {}
-            for i in range(participants_fc.length()):
-                pos_by_index[i] = participants_fc.get_participant_by_index(i).get_position()
-
-            # Total per position
-            total_by_pos = {pos: 0 for pos in PositionType}
-            for i in range(participants_fc.length()):
-                total_by_pos[pos_by_index[i]] += 1
-
-            # Apportion targets per group by Hamilton method proportional to group size
-            # targets[g][pos] -> int
-            targets = []
-            for gi, gsize in enumerate(group_sizes):
-                targets.append({pos: 0 for pos in PositionType})
-            for pos, T in total_by_pos.items():
-                # base allocations
-                bases = []
-                fracs = []
-                s = 0
-                for gsize in group_sizes:
-                    share = (T * gsize) / max(1, N)
-                    b = int(share)
-                    f = share - b
-                    bases.append(b)
-                    fracs.append(f)
-                    s += b
-                rem = T - s
-                # distribute remaining to groups with largest fractional parts
-                order = sorted(range(len(group_sizes)), key=lambda k: fracs[k], reverse=True)
-                for k in range(rem):
-                    targets[order[k]][pos] += 1
-                for gi in range(len(group_sizes)):
-                    targets[gi][pos] += bases[gi]
-
-            # Helper to get counts in group
-            def group_pos_counts(g):
-                cnt = {pos: 0 for pos in PositionType}
-                for idx in g:
-                    cnt[pos_by_index[idx]] += 1
-                return cnt
-
-            # Build quick lookups of indices by position per group
-            def indices_by_pos(g):
-                mp = {pos: [] for pos in PositionType}
-                for idx in g:
-                    mp[pos_by_index[idx]].append(idx)
-                return mp
-
-            min_size = session.get_min()
-            max_size = session.get_max()
-
-            # Iterative repair: try swaps preferred, then moves if sizes allow
-            for _ in range(200):
-                changed = False
-                counts = [group_pos_counts(g) for g in session_groups]
-                # Check done
-                ok = True
-                for gi, g in enumerate(session_groups):
-                    for pos in PositionType:
-                        if counts[gi][pos] != targets[gi][pos]:
-                            ok = False
-                            break
-                    if not ok:
-                        break
-                if ok:
-                    break
-
-                # Try swaps
-                for gi in range(len(session_groups)):
-                    g1 = session_groups[gi]
-                    c1 = counts[gi]
-                    t1 = targets[gi]
-                    excess_pos = [pos for pos in PositionType if c1[pos] > t1[pos]]
-                    deficit_pos = [pos for pos in PositionType if c1[pos] < t1[pos]]
-                    if not excess_pos:
-                        continue
-                    idx_by_pos_g1 = indices_by_pos(g1)
-                    for gj in range(len(session_groups)):
-                        if gi == gj:
-                            continue
-                        g2 = session_groups[gj]
-                        c2 = counts[gj]
-                        t2 = targets[gj]
-                        excess_pos_g2 = [pos for pos in PositionType if c2[pos] > t2[pos]]
-                        deficit_pos_g2 = [pos for pos in PositionType if c2[pos] < t2[pos]]
-                        if not deficit_pos_g2 and not excess_pos_g2:
-                            continue
-                        idx_by_pos_g2 = indices_by_pos(g2)
-                        did_swap = False
-                        for pa in excess_pos:
-                            # prefer swap against a position that g1 needs and g2 has excess
-                            for pb in deficit_pos:
-                                if pb in excess_pos_g2 and pa in deficit_pos_g2:
-                                    # swap pa from g1 with pb from g2
-                                    if idx_by_pos_g1[pa] and idx_by_pos_g2[pb]:
-                                        ia = idx_by_pos_g1[pa].pop()
-                                        ib = idx_by_pos_g2[pb].pop()
-                                        g1.remove(ia); g2.append(ia)
-                                        g2.remove(ib); g1.append(ib)
-                                        # update counts minimally
-                                        counts[gi][pa] -= 1; counts[gi][pb] += 1
-                                        counts[gj][pb] -= 1; counts[gj][pa] += 1
-                                        changed = True
-                                        did_swap = True
-                                        break
-                            if did_swap:
-                                break
-                        if did_swap:
-                            break
-                    if changed:
-                        break
-                if changed:
-                    continue
-
-                # Try single moves if sizes allow
-                for gi in range(len(session_groups)):
-                    g1 = session_groups[gi]
-                    if len(g1) <= min_size:
-                        continue
-                    c1 = counts[gi]
-                    t1 = targets[gi]
-                    excess_pos = [pos for pos in PositionType if c1[pos] > t1[pos]]
-                    if not excess_pos:
-                        continue
-                    idx_by_pos_g1 = indices_by_pos(g1)
-                    for gj in range(len(session_groups)):
-                        if gi == gj:
-                            continue
-                        g2 = session_groups[gj]
-                        if len(g2) >= max_size:
-                            continue
-                        c2 = counts[gj]
-                        t2 = targets[gj]
-                        deficit_pos_g2 = [pos for pos in PositionType if c2[pos] < t2[pos]]
-                        if not deficit_pos_g2:
-                            continue
-                        # move one participant with any excess pos matching a deficit in g2
-                        moved = False
-                        for pa in excess_pos:
-                            if pa in deficit_pos_g2 and idx_by_pos_g1[pa]:
-                                ia = idx_by_pos_g1[pa].pop()
-                                g1.remove(ia); g2.append(ia)
-                                counts[gi][pa] -= 1
-                                counts[gj][pa] += 1
-                                changed = True
-                                moved = True
-                                break
-                        if moved:
-                            break
-                    if changed:
-                        break
-                if not changed:
-                    break
+        def repair_session(session_index, row):
+            # 行（参加者ごとのグループ番号）をその場で修復する。グループ数は保ち、サイズは現在のものを使う
+            session = sessions_list[session_index]
+            meta = session_meta[session_index]
+            _repair_labels(
+                row[:session_n[session_index]], meta["pos"], meta["pos_counts"],
+                session_g[session_index], session.get_min(), session.get_max(),
+            )
+            return row
 
-            return session_groups
-        
-        def fitness(individual):
+        def evaluate(individuals, pool, keep=None):
             """
-            個体の適応度（最大化）。重みづけ: Position最優先 > ペア再会 > Lab重複。
-            罰則は大きいほど悪いので、最終的に -total_penalty を返す。
+            個体群の適応度をまとめて評価（個体を (個体, セッション, 参加者) の配列に積んで一度に計算する。
+            pool があればその配列をワーカー数に分割して分配する）
+            keep を渡すと、上位 keep 件に入り得ない個体は上界で打ち切る（選択結果は厳密評価と同じ）
             """
-            # 重み（階層的優先度を表現）
-            W_SIZE   = 1_000_000    # サイズ違反は致命的
-            W_REQ    = 10_000       # ファカルティ要件（グローバル制約）
-            W_POS    = 0            # 職位は交叉/修復で担保するため評価から除外
-            W_PAIR   = 100          # 次に重要（同一ペア再会の少なさ）
-            W_SPREAD = 40           # 異なる同席人数の分散（均等性）
-            W_LAB    = 5            # 最後に重要（ラボ重複）
-
-            pos_pen = 0.0
-            pair_pen = 0.0
-            spread_pen = 0.0
-            lab_pen = 0.0
-            size_pen = 0.0
-            req_pen = 0.0
-
-            together_count = defaultdict(int)
-            # 各人の「異なる同席相手」の集合
-            mates = {}
-
-            for (session_index, session) in enumerate(sessions):
-                session_groups = individual[session_index]
-
-                # サイズ違反
-                for group in session_groups:
-                    if not (session.get_min() <= len(group) <= session.get_max()):
-                        size_pen += 1
-
-                # グローバル制約の罰則（Domain Constraint 依存なし）
-                # 教員必須
-                for group in session_groups:
-                    faculty_count = sum(
-                        1 for p_index in group
-                        if session.get_participants().get_participant_by_index(p_index).get_position() == PositionType.FACULTY
-                    )
-                    if faculty_count < 1:
-                        req_pen += 1
-
-                # 職位バランス（過半数超過＋偏り）
-                for group in session_groups:
-                    pos_count = {pos: 0 for pos in PositionType}
-                    for p_index in group:
-                        pos_count[session.get_participants().get_participant_by_index(p_index).get_position()] += 1
-                    gsz = max(1, len(group))
-                    limit = math.ceil(gsz / 2)
-                    over = sum(max(0, c - limit) for c in pos_count.values())
-                    pos_pen += 10 * over
-                    max_c = max(pos_count.values())
-                    min_c = min(pos_count.values())
-                    pos_pen += 2 * max(0, max_c - min_c)
-
-                # ラボ重複の罰
-                for group in session_groups:
-                    lab_count = {}
-                    for p_index in group:
-                        for lab in session.get_participants().get_participant_by_index(p_index).get_lab():
-                            lab_count[lab] = lab_count.get(lab, 0) + 1
-                    for c in lab_count.values():
-                        if c > 1:
-                            lab_pen += (c - 1) * c // 2
-
-                # ペア再会カウント
-                for group in session_groups:
-                    # 異なる同席者の集合構築
-                    ids = []
-                    for idx in group:
-                        pid = session.get_participants().get_participant_by_index(idx).get_id().as_str()
-                        mates.setdefault(pid, set())
-                        ids.append(pid)
-                    for i in range(len(ids)):
-                        for j in range(i + 1, len(ids)):
-                            a, b = ids[i], ids[j]
-                            # ペア回数
-                            pair = tuple(sorted([a, b]))
-                            together_count[pair] += 1
-                            # 異なる同席相手
-                            mates[a].add(b)
-                            mates[b].add(a)
-
-            # ペア再会の罰則（1回目は0、2回目以降を加算）
-            for cnt in together_count.values():
-                if cnt > 1:
-                    # 2回目: 1, 3回目: 3, 4回目: 6, 5回目: 10... (累積的に重くなる)
-                    pair_pen += (cnt - 1) * cnt // 2
-
-            # 異なる同席人数の分散（均等性）
-            if mates:
-                counts = [len(s) for s in mates.values()]
-                avg = sum(counts) / len(counts)
-                var = sum((c - avg) ** 2 for c in counts) / len(counts)
-                spread_pen += var
-
-            total_penalty = (
-                W_SIZE * size_pen +
-                W_REQ  * req_pen +
-                W_POS  * pos_pen +
-                W_PAIR * pair_pen +
-                W_SPREAD * spread_pen +
-                W_LAB  * lab_pen
-            )
-            return -total_penalty
+            stacked = np.stack(individuals)
+            if pool is None:
+                return _score_population(stacked, fitness_arrays, keep).tolist()
+            # 各分割の上位 keep 件は全体の上位 keep 件を含むので、分割ごとに同じ keep で打ち切ってよい
+            chunks = np.array_split(stacked, min(self.num_workers, len(individuals)))
+            return np.concatenate(list(pool.map(_fitness_worker, chunks, [keep] * len(chunks)))).tolist()
         
         def crossover(parent1, parent2):
             """
             交叉操作
             """
-            child = []
-            for session_index in range(len(parent1)):
-                session = sessions_list[session_index]
-                group_sizes = equal_group_sizes(session)
-                targets = compute_position_targets(session, group_sizes)
-                # ソースは職位ごとに、親1と親2の要素を結合（重複除去）
-                source_by_pos = {pos: set() for pos in PositionType}
-                for groups in (parent1[session_index], parent2[session_index]):
-                    for g in groups:
-                        for idx in g:
-                            pos = session.get_participants().get_participant_by_index(idx).get_position()
-                            source_by_pos[pos].add(idx)
-                source_by_pos = {pos: list(lst) for pos, lst in source_by_pos.items()}
-                for pos in PositionType:
-                    random.shuffle(source_by_pos[pos])
-                session_child = build_groups_from_targets(session, targets, source_by_pos)
-                child.append(session_child)
+            child = np.full_like(parent1, -1)
+            for session_index in range(n_sessions):
+                n = session_n[session_index]
+                # ソースは親1と親2のどちらかでグループに属する参加者（通常は全員なので絞り込みを省く）
+                present = (parent1[session_index, :n] >= 0) | (parent2[session_index, :n] >= 0)
+                fill_session(child[session_index], session_index, None if present.all() else present)
             return child
         
         def mutate(individual):
             """
             突然変異操作
             """
-            for session_index in range(len(individual)):
-                session = sessions_list[session_index]
-                if random.random() < mutation_rate:
-                    groups = individual[session_index]
-                    if len(groups) >= 2:
-                        g1_idx, g2_idx = random.sample(range(len(groups)), 2)
-                        g1, g2 = groups[g1_idx], groups[g2_idx]
-                        if g1 and g2:
-                            # 同一職位のみ入れ替える
-                            # 構築: それぞれの職位のインデックスリスト
-                            def by_pos(g):
-                                mp = {pos: [] for pos in PositionType}
-                                for idx in g:
-                                    pos = session.get_participants().get_participant_by_index(idx).get_position()
-                                    mp[pos].append(idx)
-                                return mp
-                            bp1 = by_pos(g1)
-                            bp2 = by_pos(g2)
-                            pos_choices = [pos for pos in PositionType if bp1[pos] and bp2[pos]]
-                            if pos_choices:
-                                pos = random.choice(pos_choices)
-                                i1 = random.randrange(len(bp1[pos]))
-                                i2 = random.randrange(len(bp2[pos]))
-                                a = bp1[pos][i1]
-                                b = bp2[pos][i2]
-                                # 位置を見つけてスワップ
-                                g1[g1.index(a)], g2[g2.index(b)] = b, a
-                # 職位バランスの安全弁
-                individual[session_index] = repair_session_groups(session, individual[session_index])
+            mutated = np_rng.random(n_sessions) < mutation_rate
+            for session_index in range(n_sessions):
+                if mutated[session_index]:
+                    n_groups = int(session_g[session_index])
+                    if n_groups >= 2:
+                        g1, g2 = rng.sample(range(n_groups), 2)
+                        row = individual[session_index, :session_n[session_index]]
+                        pos = session_meta[session_index]["pos"]
+                        in_g1 = row == g1
+                        in_g2 = row == g2
+                        # 同一職位のみ入れ替える（両グループに居る職位から選ぶ）
+                        pos_choices = np.flatnonzero(
+                            (np.bincount(pos[in_g1], minlength=_N_POSITIONS) > 0)
+                            & (np.bincount(pos[in_g2], minlength=_N_POSITIONS) > 0)
+                        ).tolist()
+                        if pos_choices:
+                            code = rng.choice(pos_choices)
+                            cand1 = np.flatnonzero(in_g1 & (pos == code))
+                            cand2 = np.flatnonzero(in_g2 & (pos == code))
+                            a = cand1[rng.randrange(len(cand1))]
+                            b = cand2[rng.randrange(len(cand2))]
+                            # グループ番号を交換するだけでスワップになる
+                            row[a], row[b] = g2, g1
+                # 職位バランスの安全弁（何も変えないと分かっているセッションでは省く）
+                if session_needs_repair[session_index]:
+                    repair_session(session_index, individual[session_index])
             return individual
         
         # Initialize population
         population = [create_individual() for _ in range(population_size)]
 
-        for gen in range(generations):
-            scored = sorted([(fitness(ind), ind) for ind in population], reverse=True)
-            population = [ind for (_, ind) in scored[:population_size // 2]]
-            new_population = []
-            while len(new_population) < population_size:
-                parents = random.sample(population, 2)
-                child = crossover(parents[0], parents[1])
-                child = mutate(child)
-                new_population.append(child)
-            population = new_population
-            if time.time() - start_time > time_budget_seconds:
-                break
+        # 適応度評価はマスター/スレーブ型で並列化できる（GA演算子はマスター側で逐次実行）
+        # 島モデルでは各島がすでに1プロセスなので、島の中では逐次評価する
+        pool_context = (
+            ProcessPoolExecutor(
+                max_workers=self.num_workers,
+                initializer=_init_fitness_worker,
+                initargs=(fitness_arrays,),
+            )
+            if self.num_workers > 1 and migrate is None
+            else nullcontext()
+        )
+        with pool_context as pool:
+            # これまでの最良個体を (score, individual) で保持し、再評価を避ける
+            best_score, best_individual = float("-inf"), None
+            for gen in range(generations):
+                # 残すのは上位半分だけなので、全体をソートせず上位のみ取り出す（適応度順に並ぶ）
+                scored = heapq.nlargest(
+                    population_size // 2,
+                    zip(evaluate(population, pool, population_size // 2), population),
+                    key=lambda t: t[0],
+                )
+                if migrate is not None:
+                    scored = migrate(gen, scored)
+                if scored[0][0] > best_score:
+                    best_score, best_individual = scored[0]
+                population = [ind for (_, ind) in scored]
+                survivor_scores = np.fromiter((score for score, _ in scored), dtype=np.float64, count=len(scored))
+                # これまでの最良個体はエリート枠としてそのまま次世代へ残す
+                new_population = [best_individual]
+                # 親はトーナメント選択: 生存者から tournament_size 個体を無作為に選び、最良のものを親にする。
+                # 全ての子の2親分の候補を世代ごとにまとめて引く
+                candidates = np_rng.integers(0, len(population), size=(population_size - 1, 2, tournament_size))
+                winners = np.take_along_axis(
+                    candidates, survivor_scores[candidates].argmax(axis=2)[..., np.newaxis], axis=2
+                )[..., 0]
+                for i, j in winners.tolist():
+                    child = crossover(population[i], population[j])
+                    child = mutate(child)
+                    new_population.append(child)
+                population = new_population
+                if time.time() > deadline:
+                    break
 
-        best_individual = max(population, key=fitness)
+            # 最終世代（未評価の子）も一度だけ評価して比較
+            final_score, final_best = max(zip(evaluate(population, pool, 1), population), key=lambda t: t[0])
+            if final_score > best_score:
+                best_score, best_individual = final_score, final_best
 
         results: dict[int, Groups] = {}
         for (session_index, session) in enumerate(sessions):
             # 最終出力前に職位配分の修復をもう一度適用（可能な限り完全バランスへ）
-            best_individual[session_index] = repair_session_groups(session, best_individual[session_index])
-            group_objs = Groups.empty()
-            for group in best_individual[session_index]:
-                ps = Participants.empty()
-                for p_index in group:
-                    ps = ps.add_participant(session.get_participants().get_participant_by_index(p_index))
-                group_objs = group_objs.add_group(Group.create(ps))
+            labels = repair_session(session_index, best_individual[session_index])[:session_n[session_index]]
+            # add_* は毎回リストを複製するため、グループ単位でまとめて構築する
+            participants_fc = session.get_participants()
+            group_objs = Groups.of([
+                Group.create(Participants.of([
+                    participants_fc.get_participant_by_index(p_index)
+                    for p_index in np.flatnonzero(labels == gi).tolist()
+                ]))
+                for gi in range(session_g[session_index])
+            ])
             results[session_index] = group_objs
 
-        return results
\ No newline at end of file
+        return best_score, results
\ No newline at end of file
@@ -0,0 +1,82 @@
+import logging
+import multiprocessing
+import queue
+import random
+import time
+from typing import Any, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 島の結果を締め切り後にどれだけ待つか（プロセス起動や最終世代の評価に掛かる分の猶予）
+_ISLAND_RESULT_GRACE_SECONDS = 30.0
+
+
+def _island_worker(assigner, args: tuple, seed: int, inbox, outbox, results) -> None:
+    # 島ごとに異なる乱数系列で進化させる（プロセスへ複製された rng の状態は全島で同じなので差し替える）
+    assigner.rng = random.Random(seed)
+    # 受け手が先に終了していても、未配達の移住個体でプロセス終了が詰まらないようにする
+    inbox.cancel_join_thread()
+    outbox.cancel_join_thread()
+    results.put(assigner._run_island(*args, inbox, outbox))
+
+
+def run_islands(assigner, island_args: Sequence[tuple], seeds: Sequence[int], deadline: float) -> List[Any]:
+    """
+    島モデルの実行部分。島ごとに別プロセスで assigner._run_island(*island_args[i], inbox, outbox) を呼び、
+    リング状のキューで次の島へ移住させる。締め切り＋猶予までに返ってきた島の結果を返す（全滅なら空リスト）
+    """
+    k = len(island_args)
+    ctx = multiprocessing.get_context("spawn")
+    inboxes = [ctx.Queue() for _ in range(k)]
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(
+            target=_island_worker,
+            args=(assigner, island_args[i], seeds[i], inboxes[i], inboxes[(i + 1) % k], results),
+        )
+        for i in range(k)
+    ]
+    for p in procs:
+        p.start()
+    # join より先に結果を受け取る（キューに残ったままだと子プロセスが終了できない）。
+    # 例外や強制終了で結果を返さない島を待ち続けないよう、締め切り＋猶予で打ち切り、死活も確認する
+    island_bests: List[Any] = []
+    give_up = deadline + _ISLAND_RESULT_GRACE_SECONDS
+    while len(island_bests) < k:
+        remaining = give_up - time.time()
+        if remaining <= 0:
+            break
+        try:
+            island_bests.append(results.get(timeout=min(remaining, 1.0)))
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                # 終了済みの島の結果は既にパイプにあるので、待たずに回収して打ち切る
+                while len(island_bests) < k:
+                    try:
+                        island_bests.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+                break
+    for p in procs:
+        p.join(None if len(island_bests) == k else 1.0)
+        if p.is_alive():
+            p.terminate()
+            p.join()
+    if len(island_bests) < k:
+        logger.warning(
+            f"{k - len(island_bests)} of {k} islands returned no result (exit codes: {[p.exitcode for p in procs]})"
+        )
+    return island_bests
+
+
+def receive_immigrants(inbox) -> list:
+    """
+    届いている移住個体を待たずにすべて取り出す
+    """
+    immigrants = []
+    while True:
+        try:
+            immigrants.extend(inbox.get_nowait())
+        except queue.Empty:
+            break
+    return immigrants
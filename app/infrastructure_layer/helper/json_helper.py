@@ -0,0 +1,26 @@
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson が無い環境では標準ライブラリの json で代替する
+    orjson = None
+
+
+class JSONHelper:
+    """JSON のエンコード・デコード。orjson があればそれを使い、どちらでも同じ UTF-8 バイト列を返す"""
+
+    @staticmethod
+    def loads(data: bytes | str) -> Any:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj: Any, indent: bool = False) -> bytes:
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+            return orjson.dumps(obj, option=option)
+        if indent:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -1,14 +1,14 @@
 from ulid import ULID
 import re
 
+# ULID の文字種（I, L, O を除く英数字）26文字。呼び出しごとのキャッシュ参照を避けるため一度だけコンパイルする
+_ULID_PATTERN = re.compile(r'[0-9a-hjkmnp-zA-HJKMNP-Z]{26}')
+
 class ULIDHelper:
     @staticmethod
     def generate():
         return str(ULID())
-    
+
     @staticmethod
     def validate(ulid: str) -> bool:
-        pattern = r'^[0-9a-hjkmnp-zA-HJKMNP-Z]{26}$'
-        if not bool(re.match(pattern, ulid)):
-            return False
-        return True
\ No newline at end of file
+        return _ULID_PATTERN.fullmatch(ulid) is not None
\ No newline at end of file
@@ -78,9 +78,9 @@ def main() -> int:
         out_path = outputs_dir / "result.json"
         formatter.save_to_file(formatted_result, out_path)
         
-        # 保存した結果を使って共起テーブルとセッション別グループCSVを生成
-        generate_group_balance_tables(str(out_path), outputs_dir)
-        generate_session_group_matrix_csv(str(out_path), outputs_dir)
+        # 保存済みファイルを読み直さず、メモリ上の結果から共起テーブルとセッション別グループCSVを生成
+        generate_group_balance_tables(formatted_result, outputs_dir)
+        generate_session_group_matrix_csv(formatted_result, outputs_dir)
         
         return 0
     except Exception as e:
@@ -6,6 +6,9 @@ from ...domain_layer.first_class_collections.sessions import Sessions
 from ...domain_layer.entities.session import Session
 from ...domain_layer.entities.program import Program
 
+# セッションに必須の属性（この順で Session.create の group_num, min, max に渡す）
+_REQUIRED_SESSION_KEYS = ("group_num", "min", "max")
+
 class GetGroupsParamsConverter:
     @staticmethod
     def convert_json_to_params(params) -> GetGroupsParams:
@@ -25,29 +28,33 @@ class GetGroupsParamsConverter:
             if not isinstance(params["sessions"], list):
                 raise AttributeTypeError("Attribute sessions must be an list")
             
-            participants = Participants.empty()
-            for participant_dict in params["participants"]:
-                participant = ParticipantFactory.create_participant(participant_dict)
-                participants = participants.add_participant(participant)
+            # add_* は呼ぶたびにリスト全体を複製するので、リストに集めてから一度だけコレクションを作る
+            # （参加者は生成時に新しい ID が振られるため、重複チェックは不要）
+            participants = Participants.of([
+                ParticipantFactory.create_participant(participant_dict)
+                for participant_dict in params["participants"]
+            ])
 
-            sessions = Sessions.empty()
+            session_list = []
             for session_dict in params["sessions"]:
-                if "group_num" not in session_dict or session_dict["group_num"] is None:
-                    raise AttributeNotFoundError("Attribute group_num not found in session")
-                if "min" not in session_dict or session_dict["min"] is None:
-                    raise AttributeNotFoundError("Attribute min not found in session")
-                if "max" not in session_dict or session_dict["max"] is None:
-                    raise AttributeNotFoundError("Attribute max not found in session")
+                if not isinstance(session_dict, dict):
+                    raise AttributeTypeError("Each session must be an object")
+                values = [session_dict.get(key) for key in _REQUIRED_SESSION_KEYS]
+                for key, value in zip(_REQUIRED_SESSION_KEYS, values):
+                    if value is None:
+                        raise AttributeNotFoundError(f"Attribute {key} not found in session")
+                group_num, min_size, max_size = values
                 # 任意: position_targets を受け取りセッションに設定
-                position_targets = session_dict.get("position_targets") if isinstance(session_dict, dict) else None
+                position_targets = session_dict.get("position_targets")
                 session = Session.create(
-                    group_num=session_dict["group_num"],
-                    min=session_dict["min"],
-                    max=session_dict["max"],
+                    group_num=group_num,
+                    min=min_size,
+                    max=max_size,
                     participants=participants,
                     position_targets=position_targets,
                 )
-                sessions = sessions.add_session(session)
+                session_list.append(session)
+            sessions = Sessions.of(session_list)
 
             program = Program.create(
                 participants=participants,
@@ -58,23 +65,22 @@ class GetGroupsParamsConverter:
         except Exception as e:
             raise e
 
-class MissingParameterError(Exception):
+class ParamsValidationError(Exception):
+    """
+    Exception raised when the request parameters are invalid.
+    """
+
+class MissingParameterError(ParamsValidationError):
     """
     Exception raised when a required parameter is missing.
     """
-    def __init__(self, message: str):
-        super().__init__(self.message)
 
-class AttributeNotFoundError(Exception):
+class AttributeNotFoundError(ParamsValidationError):
     """
     Exception raised when a required attribute is missing.
     """
-    def __init__(self, message: str):
-        super().__init__(self.message)
 
-class AttributeTypeError(Exception):
+class AttributeTypeError(ParamsValidationError):
     """
-    Exception raised when a required attribute is missing.
+    Exception raised when an attribute has an invalid type.
     """
-    def __init__(self, message: str):
-        super().__init__(self.message)
\ No newline at end of file
@@ -1,6 +1,6 @@
-import json
 from typing import Dict, Any
 from pathlib import Path
+from ...infrastructure_layer.helper.json_helper import JSONHelper
 from ...domain_layer.first_class_collections.groups import Groups
 from ...domain_layer.services.evaluation_algorithm import TheoreticalMinCalculator, DistinctPartnersCalculator
 
@@ -32,15 +32,13 @@ class GroupAssignmentResultFormatter:
         lab_overlap_stats = self._distinct_partners_calculator.calculate_lab_overlap_statistics(groups)
         
         # プログラムの整形
-        program_out = []
-        for key, value in groups.items():
-            session = []
-            for group in value:
-                members = []
-                for participant in group.get_participants():
-                    members.append(f"{participant.get_name().as_str()}({participant.get_position().as_str()})")
-                session.append(members)
-            program_out.append(session)
+        program_out = [
+            [
+                [participant.display_label for participant in group.get_participants()]
+                for group in value
+            ]
+            for value in groups.values()
+        ]
         
         return {
             "program": program_out,
@@ -55,7 +53,7 @@ class GroupAssignmentResultFormatter:
     
     def format_for_console(self, result: Dict[str, Any]) -> str:
         """コンソール出力用に整形"""
-        output = json.dumps(result, ensure_ascii=False, indent=2)
+        output = JSONHelper.dumps(result, indent=True).decode("utf-8")
         output += f"\n評価値(avg_repeat_per_person): {result['evaluation']['avg_repeat_per_person']}"
         output += f"\n理論最小値(theoretical_min_avg_repeat): {result['evaluation']['theoretical_min_avg_repeat']}"
         
@@ -69,5 +67,5 @@ class GroupAssignmentResultFormatter:
     
     def save_to_file(self, result: Dict[str, Any], file_path: Path) -> None:
         """結果をファイルに保存"""
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        with open(file_path, "wb") as f:
+            f.write(JSONHelper.dumps(result, indent=True))
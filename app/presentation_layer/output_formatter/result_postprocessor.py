@@ -1,17 +1,15 @@
 from typing import Dict, Any
 
+import numpy as np
+
 
 def add_distinct_partners_stats(formatted_result: Dict[str, Any]) -> None:
     """formatted_result['evaluation'] に平均と分散を付加する。in-place更新。"""
     evaluation = formatted_result.get("evaluation", {})
     distinct_map = evaluation.get("distinct_partners_per_person", {})
-    counts = list(distinct_map.values())
-    if not counts:
+    if not distinct_map:
         return
-    mean_val = sum(counts) / len(counts)
-    var_val = sum((c - mean_val) ** 2 for c in counts) / len(counts)
-    evaluation["distinct_partners_avg"] = mean_val
-    evaluation["distinct_partners_variance"] = var_val
+    counts = np.fromiter(distinct_map.values(), dtype=np.float64, count=len(distinct_map))
+    evaluation["distinct_partners_avg"] = float(counts.mean())
+    evaluation["distinct_partners_variance"] = float(counts.var())
     formatted_result["evaluation"] = evaluation
-
-
@@ -1,114 +1,116 @@
-import json
-import re
-from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple, Union
 
+import numpy as np
 
-def _extract_participant_name(full_name: str) -> str:
-    match = re.match(r'(.+?)\([^)]+\)', full_name)
-    return match.group(1) if match else full_name
-
-
-def _analyze_group_balance(result_file: str) -> Dict[str, Dict[str, int]]:
-    with open(result_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+from ...infrastructure_layer.helper.json_helper import JSONHelper
 
-    cooccurrence: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
 
-    for session_groups in data['program']:
+def _extract_participant_name(full_name: str) -> str:
+    # "名前(研究室)" から名前部分を取り出す。先頭以外の "(" のうち、空でない "(...)" が続く最初のものまでを名前とする
+    i = full_name.find('(', 1)
+    while i != -1:
+        j = full_name.find(')', i + 1)
+        if j == -1:
+            break
+        if j > i + 1:
+            return full_name[:i]
+        i = full_name.find('(', i + 1)
+    return full_name
+
+
+def _load_result(result_or_path: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+    """整形済み結果の辞書はそのまま使い、パスが渡された場合のみファイルから読み込む"""
+    if isinstance(result_or_path, dict):
+        return result_or_path
+    with open(result_or_path, 'rb') as f:
+        return JSONHelper.loads(f.read())
+
+
+def _analyze_group_balance(result: Dict[str, Any]) -> Tuple[List[str], np.ndarray]:
+    """
+    共起回数を参加者名のソート順に並べた (名前リスト, N x N の int32 行列) で返す。
+    一度も他者と同じグループにならなかった参加者は含めない。
+    同じ表示名の別人が同じグループに居る場合は、その組を対角成分に数える。
+    """
+    # 名前を一度だけ抽出して整数IDへ写像する
+    name_to_id: Dict[str, int] = {}
+    groups_ids: List[np.ndarray] = []
+    for session_groups in result['program']:
         for group in session_groups:
-            for i in range(len(group)):
-                for j in range(i + 1, len(group)):
-                    name1 = _extract_participant_name(group[i])
-                    name2 = _extract_participant_name(group[j])
-                    cooccurrence[name1][name2] += 1
-                    cooccurrence[name2][name1] += 1
-
-    return cooccurrence
+            if len(group) < 2:
+                continue
+            ids = [name_to_id.setdefault(_extract_participant_name(x), len(name_to_id)) for x in group]
+            groups_ids.append(np.asarray(ids, dtype=np.intp))
+
+    matrix = np.zeros((len(name_to_id), len(name_to_id)), dtype=np.int32)
+    for ids in groups_ids:
+        # 同名の別人が居ると ids に重複が出るため、バッファ付きの += ではなく出現ごとに加算する
+        np.add.at(matrix, np.ix_(ids, ids), 1)
+    # 各メンバーと自分自身の組（グループ内の同じ位置同士）は数えない
+    if groups_ids:
+        matrix[np.diag_indices_from(matrix)] -= np.bincount(np.concatenate(groups_ids), minlength=len(name_to_id)).astype(np.int32)
+
+    # 名前順に並べ替え、共起のない参加者を除く
+    names = sorted(name_to_id)
+    order = np.fromiter((name_to_id[n] for n in names), dtype=np.intp, count=len(names))
+    matrix = matrix[np.ix_(order, order)]
+    present = matrix.any(axis=1)
+    if not present.all():
+        names = [n for n, keep in zip(names, present) if keep]
+        matrix = matrix[np.ix_(present, present)]
+    return names, matrix
+
+
+def _generate_markdown_table(participants: List[str], matrix: np.ndarray, output_file: str) -> None:
+    # 行ごとに断片を連結し、ファイル全体を一度に書き出す
+    lines = [
+        "| 参加者 |" + "".join(f" {participant} |" for participant in participants),
+        "|--------|" + "--------|" * len(participants),
+    ]
+    for i, participant in enumerate(participants):
+        cells = [f" {count} |" for count in matrix[i].tolist()]
+        cells[i] = " - |"
+        lines.append(f"| {participant} |" + "".join(cells))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
 
 
-def _get_all_participants(cooccurrence: Dict[str, Dict[str, int]]) -> List[str]:
-    participants = set()
-    for p in cooccurrence.keys():
-        participants.add(p)
-        for other in cooccurrence[p].keys():
-            participants.add(other)
-    return sorted(list(participants))
+def _generate_csv_table(participants: List[str], matrix: np.ndarray, output_file: str) -> None:
+    lines = ["参加者," + ",".join(participants)]
+    for i, participant in enumerate(participants):
+        row = [str(count) for count in matrix[i].tolist()]
+        row[i] = "-"
+        lines.append(f"{participant}," + ",".join(row))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines) + "\n")
 
 
-def _generate_markdown_table(cooccurrence: Dict[str, Dict[str, int]], output_file: str) -> None:
-    participants = _get_all_participants(cooccurrence)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("| 参加者 |")
-        for participant in participants:
-            f.write(f" {participant} |")
-        f.write("\n")
-        f.write("|--------|")
-        for _ in participants:
-            f.write("--------|")
-        f.write("\n")
-        for participant in participants:
-            f.write(f"| {participant} |")
-            for other in participants:
-                if participant == other:
-                    f.write(" - |")
-                else:
-                    count = cooccurrence[participant].get(other, 0)
-                    f.write(f" {count} |")
-            f.write("\n")
-
-
-def _generate_csv_table(cooccurrence: Dict[str, Dict[str, int]], output_file: str) -> None:
-    participants = _get_all_participants(cooccurrence)
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("参加者,")
-        f.write(",".join(participants))
-        f.write("\n")
-        for participant in participants:
-            f.write(f"{participant},")
-            row: List[str] = []
-            for other in participants:
-                if participant == other:
-                    row.append("-")
-                else:
-                    row.append(str(cooccurrence[participant].get(other, 0)))
-            f.write(",".join(row))
-            f.write("\n")
-
-
-def generate_group_balance_tables(result_json_path: str, outputs_dir: Path) -> None:
+def generate_group_balance_tables(result_or_path: Union[Dict[str, Any], str], outputs_dir: Path) -> None:
     print("\nグループのバランス分析を開始...")
-    cooccurrence = _analyze_group_balance(result_json_path)
-    participants = _get_all_participants(cooccurrence)
+    participants, matrix = _analyze_group_balance(_load_result(result_or_path))
     print(f"参加者数: {len(participants)}")
 
     outputs_dir.mkdir(parents=True, exist_ok=True)
     markdown_file = str(outputs_dir / "group_balance_table.md")
     csv_file = str(outputs_dir / "group_balance_table.csv")
-    _generate_markdown_table(cooccurrence, markdown_file)
-    _generate_csv_table(cooccurrence, csv_file)
-
-    max_co, max_pair, total_co, pair_cnt = 0, None, 0, 0
-    for i, p in enumerate(participants):
-        for j in range(i + 1, len(participants)):
-            other = participants[j]
-            c = cooccurrence[p].get(other, 0)
-            total_co += c
-            pair_cnt += 1
-            if c > max_co:
-                max_co = c
-                max_pair = (p, other)
-
-    if max_pair is not None:
-        print(f"最も多く一緒になったペア: {max_pair[0]} - {max_pair[1]} ({max_co}回)")
-    if pair_cnt > 0:
-        print(f"平均共起回数: {total_co / pair_cnt:.2f}")
-
-    per_person_avg: Dict[str, float] = {}
-    for p in participants:
-        total = sum(cooccurrence[p].values())
-        per_person_avg[p] = total / (len(participants) - 1)
+    _generate_markdown_table(participants, matrix, markdown_file)
+    _generate_csv_table(participants, matrix, csv_file)
+
+    # 行和を一度だけ求め、全体平均と各参加者の平均の両方に使う（各参加者の平均は同名同士の対角成分も含む）
+    n = len(participants)
+    row_sums = matrix.sum(axis=1).tolist()
+    if n > 1:
+        # 対角を除いた対称行列では、行優先の最初の最大要素は上三角（i < j）で最初に現れる最大ペアと一致する
+        off_diagonal = matrix.copy()
+        np.fill_diagonal(off_diagonal, 0)
+        i, j = divmod(int(off_diagonal.argmax()), n)
+        max_co = int(off_diagonal[i, j])
+        if max_co > 0:
+            print(f"最も多く一緒になったペア: {participants[i]} - {participants[j]} ({max_co}回)")
+        print(f"平均共起回数: {(sum(row_sums) - int(np.trace(matrix))) // 2 / (n * (n - 1) // 2):.2f}")
+
+    per_person_avg: Dict[str, float] = {p: total / (n - 1) for p, total in zip(participants, row_sums)}
     print("\n各参加者の平均共起回数:")
     for p, avg in sorted(per_person_avg.items(), key=lambda x: x[1], reverse=True):
         print(f"  {p}: {avg:.2f}")
@@ -117,7 +119,7 @@ def generate_group_balance_tables(result_json_path: str, outputs_dir: Path) -> N
     print(f"📈 CSVテーブル: {csv_file}")
 
 
-def generate_session_group_matrix_csv(result_json_path: str, outputs_dir: Path) -> None:
+def generate_session_group_matrix_csv(result_or_path: Union[Dict[str, Any], str], outputs_dir: Path) -> None:
     """
     セッションごとに、列=グループ(A,B,...)、行=メンバー名のCSVを出力する。
     形式:
@@ -130,10 +132,7 @@ def generate_session_group_matrix_csv(result_json_path: str, outputs_dir: Path)
     outputs_dir.mkdir(parents=True, exist_ok=True)
     matrix_csv = outputs_dir / "session_groups_matrix.csv"
 
-    with open(result_json_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    sessions = data.get('program', [])
+    sessions = _load_result(result_or_path).get('program', [])
 
     with open(matrix_csv, 'w', encoding='utf-8') as out:
         for s_idx, session_groups in enumerate(sessions):
@@ -1,12 +1,16 @@
-import json
+import os
 
 from ...application_layer.repository_interfaces.member_repository import MemberRepository
+from ...infrastructure_layer.helper.json_helper import JSONHelper
 
 from ...domain_layer.member import Attribute, Attributes, Member, Members
 
 
 PATH = "app/members.json"
 
+# read_json の結果を (更新時刻 ns, 読み込んだデータ) で保持し、ファイルが変わっていなければ再パースしない
+_CACHE: tuple[int, dict] | None = None
+
 class MemberRepositoryImpl(MemberRepository):
 
     def __init__(self, members: Members):
@@ -14,7 +18,6 @@ class MemberRepositoryImpl(MemberRepository):
 
     @staticmethod
     def of():
-        members = Members.empty()
         try:
             data = MemberRepositoryImpl.read_json()
             if data is None:
@@ -26,18 +29,18 @@ class MemberRepositoryImpl(MemberRepository):
             if not isinstance(data['members'], list):
                 raise ValueError("'members' must be a list")
             members_json: list[dict] = data.get('members')
-            count = 0
-            for member_json in members_json:
+            # add_member / add_attribute は毎回 dict を複製するため、dict を組み立ててから一度だけ生成する
+            member_dict: dict[int, Member] = {}
+            for count, member_json in enumerate(members_json):
                 if not isinstance(member_json, dict):
                     raise ValueError("Each member must be a dictionary")
-                attributes: Attributes = Attributes.empty()
-                for key in member_json.keys():
+                attribute_dict: dict[str, Attribute] = {}
+                for key, value in member_json.items():
                     if not isinstance(key, str):
                         raise ValueError("Member ID must be a string")
-                    attributes = attributes.add_attribute(Attribute.of(key, member_json[key]))
-                member: Member = Member.of(count, attributes)
-                members: Members = members.add_member(member)
-                count += 1
+                    attribute_dict[key] = Attribute.of(key, value)
+                member_dict[count] = Member.of(count, Attributes.of(attribute_dict))
+            members = Members.of(member_dict)
         except ValueError as e:
             raise ValueError(f"Invalid input: {e}")
         
@@ -45,14 +48,22 @@ class MemberRepositoryImpl(MemberRepository):
 
     @staticmethod
     def read_json():
-        with open(PATH, 'r') as file:
-            data = json.load(file)
+        global _CACHE
+        mtime = os.stat(PATH).st_mtime_ns
+        if _CACHE is not None and _CACHE[0] == mtime:
+            return _CACHE[1]
+        with open(PATH, 'rb') as file:
+            data = JSONHelper.loads(file.read())
+        _CACHE = (mtime, data)
         return data
     
     @staticmethod
     def write_json(data):
-        with open(PATH, 'w') as file:
-            json.dump(data, file)
+        global _CACHE
+        with open(PATH, 'wb') as file:
+            file.write(JSONHelper.dumps(data))
+        # 更新時刻の粒度によっては変更を検知できないため、書き込み時は明示的に破棄する
+        _CACHE = None
 
     def find_all(self) -> Members:
         return self.members
@@ -1,10 +1,10 @@
 # Moved from app/app.py to avoid name clash with package name when running CLI
-from flask import Flask
-import json
+from flask import Flask, Response
 
 from .presentation_layer.input_converter.get_groups_params_converter import GetGroupsParamsConverter
 from .infrastructure_layer.domain_implementations.group_assinger_ga import GroupAssignerGA
 from .domain_layer.first_class_collections.groups import Groups
+from .infrastructure_layer.helper.json_helper import JSONHelper
 
 app = Flask(__name__)
 
@@ -22,17 +22,12 @@ def assing_groups():
         }
         params = GetGroupsParamsConverter.convert_json_to_params(data)
         groups: dict[int, Groups] = GroupAssignerGA().assign_groups(params.program)
-        program = []
-        for key, value in groups.items():
-            session = []
-            for group in value:
-                members = []
-                for participant in group.get_participants():
-                    members.append(participant.get_name().as_str())
-                session.append(members)
-            program.append(session)
-        groups_dict = {"program": program}
-        return groups_dict
+        program = [
+            [[participant.get_name().as_str() for participant in group.get_participants()] for group in value]
+            for value in groups.values()
+        ]
+        # Flask 既定の json エンコーダを経由せず、直接バイト列にして返す
+        return Response(JSONHelper.dumps({"program": program}), mimetype="application/json")
     except Exception as e:
         raise e
 